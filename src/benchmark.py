@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+"""Generate synthetic menu trees and measure launcher performance.
+
+    python -m pylauncher.benchmark generate <dir> [options]
+    python -m pylauncher.benchmark run <dir>/root.json [options]
+    python -m pylauncher.benchmark http <dir>/root.json [options]
+    python -m pylauncher.benchmark convert <file>.config ... [options]
+
+Results are written as JSON, so runs of different versions can be compared
+with --compare.
+"""
+
+import os
+import sys
+import json
+import time
+import gzip
+import random
+import threading
+import argparse
+import platform
+import statistics
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows
+
+from .stats import percentile
+
+DEFAULT_MIX = "cmd=6,caqtdm=2,url=1,title=1,separator=1"
+
+
+def parseMix(mix):
+    """Parse "type=weight,..." into {type: weight}."""
+
+    weights = dict()
+    for part in mix.split(","):
+        itemType, _, weight = part.partition("=")
+        weights[itemType.strip()] = float(weight or 1)
+    return weights
+
+
+def generateItem(itemType, name, rnd, themes, themeShare):
+    if itemType == "separator":
+        item = {"type": "separator"}
+    elif itemType == "title":
+        item = {"type": "title", "text": "Section " + name}
+    elif itemType == "url":
+        item = {"type": "url", "text": "Docs " + name,
+                "url": "https://example.org/" + name}
+    elif itemType == "caqtdm":
+        item = {"type": "caqtdm", "text": "Panel " + name,
+                "panel": "panel_" + name + ".ui",
+                "macros": "SYS=S" + name + ",DEV=D" + str(rnd.randint(0, 99))}
+    else:
+        item = {"type": itemType, "text": "Command " + name,
+                "command": "echo " + name}
+    if themes and itemType != "separator" and rnd.random() < themeShare:
+        item["theme"] = rnd.choice(themes)
+    return item
+
+
+def generateTree(outDir, depth=3, breadth=4, items=20, mix=DEFAULT_MIX,
+                 shared=0.2, themes=2, themeShare=0.1, seed=0):
+    """Write menu tree, themes and mapping to outDir.
+
+    Each menu has items items and, above depth, breadth submenus. A share of
+    submenu references points to a few shared menus, which are referenced
+    from many places. Returns number of written menus and items.
+    """
+
+    rnd = random.Random(seed)
+    weights = parseMix(mix)
+    types = list(weights)
+    os.makedirs(os.path.join(outDir, "themes"), exist_ok=True)
+
+    themeNames = ["theme_" + str(i) for i in range(themes)]
+    for i, theme in enumerate(themeNames):
+        with open(os.path.join(outDir, "themes", theme + ".qss"), "w") as f:
+            f.write("LauncherButton { color: #%06x; }\n" % (i * 0x3f3f3f))
+
+    currDir = os.path.dirname(os.path.realpath(__file__))
+    with open(os.path.join(currDir, "resources/mapping/mapping.json")) as f:
+        mapping = json.load(f)
+    for systemCfg in mapping.values():
+        systemCfg["theme_base"] = "themes/"
+    with open(os.path.join(outDir, "mapping.json"), "w") as f:
+        json.dump(mapping, f, indent=4)
+
+    # Shared menus are leaves, so they do not create cycles
+    sharedNames = ["shared_" + str(i) for i in range(max(1, breadth // 2))]
+    stats = {"menus": 0, "items": 0}
+
+    def writeMenu(fileName, title, level):
+        menuItems = list()
+        for i in range(items):
+            itemType = rnd.choices(types, [weights[t] for t in types])[0]
+            menuItems.append(generateItem(
+                itemType, fileName[:-5] + "_" + str(i), rnd, themeNames,
+                themeShare))
+        if level < depth and not fileName.startswith("shared_"):
+            for i in range(breadth):
+                if rnd.random() < shared:
+                    subName = rnd.choice(sharedNames)
+                else:
+                    subName = "%s_%d" % (fileName[:-5], i)
+                    writeMenu(subName + ".json", "Menu " + subName, level + 1)
+                menuItems.insert(rnd.randint(0, len(menuItems)),
+                                 {"type": "menu", "text": "Menu " + subName,
+                                  "file": subName + ".json"})
+        menu = {"menu-title": {"text": title}, "menu": menuItems}
+        with open(os.path.join(outDir, fileName), "w") as f:
+            json.dump(menu, f, indent=1)
+        stats["menus"] += 1
+        stats["items"] += len(menuItems)
+
+    for sharedName in sharedNames:
+        writeMenu(sharedName + ".json", "Shared " + sharedName, depth)
+    writeMenu("root.json", "Benchmark", 0)
+    return stats
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def summary(values):
+    """Return statistics of durations in ms."""
+
+    values = sorted(v * 1000 for v in values)
+    return {"min": round(values[0], 3),
+            "p50": round(statistics.median(values), 3),
+            "p95": round(percentile(values, 95), 3),
+            "max": round(values[-1], 3),
+            "n": len(values)}
+
+
+def countItems(menuModel):
+    count = 0
+    for item in menuModel.menu_items:
+        count += 1
+        if hasattr(item, "sub_menu"):
+            count += countItems(item.sub_menu)
+    return count
+
+
+def runBenchmark(rootPath, mappingPath, terms, repeat):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QEventLoop
+    from PyQt5.QtWidgets import QApplication
+    from .launcher import LauncherWindow, LauncherSubMenu
+    from .launcher_model import launcher_menu_model
+
+    app = QApplication.instance() or QApplication([])
+
+    with open(mappingPath) as f:
+        cfg = json.load(f)
+    cfg["cfg_base"] = os.path.dirname(os.path.abspath(mappingPath))
+    systemType = platform.system()
+    if systemType == "Darwin":
+        systemType = "OS_X"
+    launcherCfg = dict(cfg[systemType])
+    rootPath = os.path.abspath(rootPath)
+    launcherCfg["launcher_base"] = os.path.dirname(rootPath)
+
+    results = dict()
+
+    # Parse: first parse in the process (file cache may still be warm)
+    # and following parses.
+    cold, menuModel = timed(launcher_menu_model, None, rootPath, 0,
+                            launcherCfg)
+    results["parse-cold"] = round(cold * 1000, 3)
+    results["parse-warm"] = summary(
+        [timed(launcher_menu_model, None, rootPath, 0, launcherCfg)[0]
+         for _ in range(repeat)])
+
+    # Time to first show: window with model and widgets, shown and painted
+    def firstShow():
+        window = LauncherWindow(rootPath, cfg)
+        window.show()
+        app.processEvents()
+        return window
+
+    firstShowTime, window = timed(firstShow)
+    results["first-show"] = round(firstShowTime * 1000, 3)
+
+    # Progressive start: window shown at once, menu loaded in background
+    loop = QEventLoop()
+    done = list()
+
+    def firstPaint():
+        progressiveWindow = LauncherWindow(rootPath, cfg, progressive=True)
+        progressiveWindow.menuLoaded.connect(lambda: done.append(True))
+        progressiveWindow.loadFailed.connect(lambda: done.append(False))
+        progressiveWindow.menuLoaded.connect(loop.quit)
+        progressiveWindow.loadFailed.connect(loop.quit)
+        progressiveWindow.show()
+        app.processEvents()
+        return progressiveWindow
+
+    start = time.perf_counter()
+    firstPaintTime, progressiveWindow = timed(firstPaint)
+    if not done:
+        loop.exec_()
+    results["first-paint"] = round(firstPaintTime * 1000, 3)
+    results["progressive-ready"] = round(
+        (time.perf_counter() - start) * 1000, 3)
+    progressiveWindow.close()
+
+    # Widgets of whole tree from existing model
+    durations = list()
+    for _ in range(repeat):
+        duration, menu = timed(LauncherSubMenu, window.menuModel, None,
+                               window)
+        durations.append(duration)
+        menu.deleteLater()
+    app.processEvents()
+    results["widget-build"] = summary(durations)
+
+    # Filter latency per keystroke, as if terms were typed in filter box
+    durations = list()
+    for term in terms:
+        for i in range(1, len(term) + 1):
+            durations.append(timed(window.searchInput.setText, term[:i])[0])
+        for i in range(len(term) - 1, -1, -1):
+            durations.append(timed(window.searchInput.setText, term[:i])[0])
+    results["filter-keystroke"] = summary(durations)
+
+    # Search view opened from filter box
+    durations = list()
+    searchInput = window.searchInput.searchInput
+    for term in terms:
+        searchInput.setText(term)
+
+        def openSearch():
+            searchInput.openSearch()
+            app.processEvents()
+
+        durations.append(timed(openSearch)[0])
+        for child in window.launcherMenu.children():
+            if child.__class__.__name__ == "LauncherSearchMenuView":
+                child.deleteLater()
+        app.processEvents()
+    searchInput.setText("")
+    results["search-open"] = summary(durations)
+
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            maxrss //= 1024  # Bytes on OS X, KiB elsewhere
+        results["peak-memory-kb"] = maxrss
+
+    window.close()
+    return {"tree": {"root": rootPath, "items": countItems(menuModel)},
+            "results": results}
+
+
+def runHttpBenchmark(rootPath, mappingPath, repeat, compress):
+    """Parse menu tree served by a local HTTP server.
+
+    Server counts opened connections and requests, so reuse of connections
+    by the launcher can be checked.
+    """
+
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+    from .launcher_model import launcher_menu_model
+    from .launcher_http import default_pool
+
+    counts = {"connections": 0, "requests": 0}
+    lock = threading.Lock()
+    rootDir = os.path.dirname(os.path.abspath(rootPath))
+
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and content are sent separately, avoid delayed ACKs
+        disable_nagle_algorithm = True
+
+        def __init__(self, *args, **kwargs):
+            with lock:
+                counts["connections"] += 1
+            SimpleHTTPRequestHandler.__init__(self, *args, directory=rootDir,
+                                              **kwargs)
+
+        def do_GET(self):
+            with lock:
+                counts["requests"] += 1
+            path = self.translate_path(self.path)
+            if not compress or not os.path.isfile(path) or \
+                    "gzip" not in self.headers.get("Accept-Encoding", ""):
+                return SimpleHTTPRequestHandler.do_GET(self)
+            with open(path, "rb") as f:
+                data = gzip.compress(f.read())
+            self.send_response(200)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    serverThread = threading.Thread(target=server.serve_forever, daemon=True)
+    serverThread.start()
+    rootUrl = "http://127.0.0.1:{}/{}".format(server.server_address[1],
+                                             os.path.basename(rootPath))
+
+    with open(mappingPath) as f:
+        cfg = json.load(f)
+    systemType = platform.system()
+    if systemType == "Darwin":
+        systemType = "OS_X"
+    launcherCfg = dict(cfg[systemType])
+    launcherCfg["launcher_base"] = rootUrl.rpartition("/")[0]
+
+    try:
+        times = list()
+        for _ in range(repeat):
+            duration, menuModel = timed(launcher_menu_model, None, rootUrl, 0,
+                                        launcherCfg)
+            times.append(duration)
+    finally:
+        default_pool.close()
+        server.shutdown()
+        server.server_close()
+
+    return {"tree": {"root": rootUrl, "items": countItems(menuModel)},
+            "results": {"parse-http": summary(times),
+                        "requests": counts["requests"],
+                        "connections": counts["connections"]}}
+
+
+def runConvertBenchmark(configPaths, repeat, compareParsers):
+    """Split lines of Tcl configuration files as pylauncher-convert does.
+
+    Lines are read once and then split repeat times, so only splitting is
+    measured. If compareParsers, lines are also split with pyparsing, which
+    split_line must match.
+    """
+
+    from .convert.convert import LauncherBaseModel
+
+    lines = list()
+    for configPath in configPaths:
+        with open(configPath) as f:
+            lines.extend(line for _, line in LauncherBaseModel.read_lines(f))
+
+    def splitLines(split):
+        return [split(line) for line in lines]
+
+    times = list()
+    for _ in range(repeat):
+        duration, tokens = timed(splitLines, LauncherBaseModel.split_line)
+        times.append(duration)
+    results = {"split-line": summary(times),
+               "lines-per-second": round(len(lines) /
+                                         statistics.median(times)),
+               "fallback-lines": sum(1 for t in tokens if t is None)}
+
+    if compareParsers:
+        duration, expected = timed(splitLines,
+                                   LauncherBaseModel.split_line_pyparsing)
+        results["pyparsing-lines-per-second"] = round(len(lines) / duration)
+        results["mismatches"] = sum(
+            1 for t, e in zip(tokens, expected) if t is not None and t != e)
+
+    return {"tree": {"files": len(configPaths), "lines": len(lines)},
+            "results": results}
+
+
+def getVersion():
+    try:
+        from importlib.metadata import version
+        return version("pylauncher")
+    except Exception:
+        return None
+
+
+def compareResults(old, new):
+    """Print relative change of each result between two runs."""
+
+    for key, value in new["results"].items():
+        oldValue = old.get("results", dict()).get(key)
+        if isinstance(value, dict):
+            value = value["p50"]
+            oldValue = oldValue["p50"] if oldValue else None
+        if not oldValue:
+            print("  {:20s} {:>12} -> {:>12}".format(key, "-", value))
+            continue
+        print("  {:20s} {:>12} -> {:>12} ({:+.1f} %)".format(
+            key, oldValue, value, (value - oldValue) / oldValue * 100))
+
+
+def getMappingPath(args):
+    return args.mapping or os.path.join(
+        os.path.dirname(args.configuration), "mapping.json")
+
+
+def main():
+    """ Main logic """
+
+    argsParse = argparse.ArgumentParser(description='Generate menu trees and benchmark pylauncher')
+    subParsers = argsParse.add_subparsers(dest="command")
+    subParsers.required = True
+
+    generateParse = subParsers.add_parser('generate', help="generate menu tree")
+    generateParse.add_argument('directory', help="output directory")
+    generateParse.add_argument('--depth', type=int, default=3,
+                               help="depth of submenus (default: 3)")
+    generateParse.add_argument('--breadth', type=int, default=4,
+                               help="submenus per menu (default: 4)")
+    generateParse.add_argument('--items', type=int, default=20,
+                               help="items per menu (default: 20)")
+    generateParse.add_argument('--mix', default=DEFAULT_MIX,
+                               help="weights of item types (default: " + DEFAULT_MIX + ")")
+    generateParse.add_argument('--shared', type=float, default=0.2,
+                               help="share of submenus which are shared menus (default: 0.2)")
+    generateParse.add_argument('--themes', type=int, default=2,
+                               help="number of themes (default: 2)")
+    generateParse.add_argument('--theme-share', type=float, default=0.1,
+                               help="share of items with a theme (default: 0.1)")
+    generateParse.add_argument('--seed', type=int, default=0,
+                               help="random seed (default: 0)")
+
+    runParse = subParsers.add_parser('run', help="run benchmark")
+    runParse.add_argument('configuration', help="root menu file")
+    runParse.add_argument('-m', '--mapping',
+                          help="mapping file (default: mapping.json next to configuration)")
+    runParse.add_argument('--terms', nargs='+', default=["Command 1", "panel", "zzz"],
+                          help="filter terms typed key by key")
+    runParse.add_argument('--repeat', type=int, default=5,
+                          help="repetitions of each measurement (default: 5)")
+    runParse.add_argument('-o', '--output', help="write results to file")
+    runParse.add_argument('--compare', help="results of previous run to compare with")
+
+    httpParse = subParsers.add_parser('http', help="parse menu tree served by a local HTTP server")
+    httpParse.add_argument('configuration', help="root menu file")
+    httpParse.add_argument('-m', '--mapping',
+                           help="mapping file (default: mapping.json next to configuration)")
+    httpParse.add_argument('--repeat', type=int, default=5,
+                           help="repetitions of parse (default: 5)")
+    httpParse.add_argument('--gzip', action='store_true',
+                           help="serve files with gzip Content-Encoding")
+    httpParse.add_argument('-o', '--output', help="write results to file")
+    httpParse.add_argument('--compare', help="results of previous run to compare with")
+
+    convertParse = subParsers.add_parser('convert', help="split lines of Tcl configuration files")
+    convertParse.add_argument('configuration', nargs='+', help="Tcl configuration files")
+    convertParse.add_argument('--repeat', type=int, default=5,
+                              help="repetitions of split (default: 5)")
+    convertParse.add_argument('--pyparsing', action='store_true',
+                              help="also split with pyparsing and count lines which differ")
+    convertParse.add_argument('-o', '--output', help="write results to file")
+    convertParse.add_argument('--compare', help="results of previous run to compare with")
+    args = argsParse.parse_args()
+
+    if args.command == "generate":
+        stats = generateTree(args.directory, args.depth, args.breadth,
+                             args.items, args.mix, args.shared, args.themes,
+                             args.theme_share, args.seed)
+        print("Generated {} menus with {} items in {}".format(
+            stats["menus"], stats["items"], args.directory))
+        return
+
+    if args.command == "convert":
+        result = runConvertBenchmark(args.configuration, args.repeat,
+                                     args.pyparsing)
+    elif args.command == "http":
+        result = runHttpBenchmark(args.configuration, getMappingPath(args),
+                                  args.repeat, args.gzip)
+    else:
+        result = runBenchmark(args.configuration, getMappingPath(args),
+                              args.terms, args.repeat)
+    result["version"] = getVersion()
+    result["python"] = platform.python_version()
+    result["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    output = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print("Compared to {} ({}):".format(args.compare, old.get("version")))
+        compareResults(old, result)
+
+
+# Start program here
+if __name__ == '__main__':
+    main()
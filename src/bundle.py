@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import sys
+import json
+import logging
+import argparse
+import platform
+import collections
+
+from .launcher_bundle import THEMES_DIR, write_bundle
+from .launcher_model import expand_repeat_item
+from .launcher_tcl import is_tcl_menu, get_level_path, convert_tcl_menu
+
+
+def loadMenu(filePath, levelPath):
+    """Return content and data of menu file.
+
+    Legacy .config menus are converted and stored as JSON.
+    """
+
+    if is_tcl_menu(filePath):
+        data, _ = convert_tcl_menu(filePath, levelPath)
+        return json.dumps(data).encode("utf-8"), data
+
+    with open(filePath, "rb") as menuFile:
+        content = menuFile.read()
+    try:
+        return content, json.loads(content.decode("utf-8"))
+    except ValueError as e:
+        logging.error("In file \"" + filePath + "\": " + str(e))
+        sys.exit(-1)
+
+
+def findReferences(data):
+    """Return files of submenus and file choices and used themes."""
+
+    files = list()
+    themes = set()
+    for view in data.get("file-choice", list()):
+        if view.get("file"):
+            files.append(view["file"].strip())
+        if view.get("theme"):
+            themes.add(view["theme"])
+    if data.get("menu-title", dict()).get("theme"):
+        themes.add(data["menu-title"]["theme"])
+    for item in data.get("menu", list()):
+        if item.get("type") == "repeat":
+            try:
+                items = list(expand_repeat_item(item))
+            except ValueError:
+                items = list()  # Reported when menu is parsed
+            repeatFiles, repeatThemes = findReferences({"menu": items})
+            files.extend(repeatFiles)
+            themes.update(repeatThemes)
+            continue
+        if item.get("type") == "menu" and item.get("file"):
+            files.append(item["file"].strip())
+        if item.get("theme"):
+            themes.add(item["theme"])
+    return files, themes
+
+
+def collectMenus(rootPath):
+    """Load root menu and all menus referenced from it.
+
+    Returns OrderedDict {path: content} and set of used themes.
+    """
+
+    levelPath = get_level_path(rootPath)
+    menus = collections.OrderedDict()
+    themes = set()
+    queue = collections.deque([rootPath])
+    seen = set(queue)
+    while queue:
+        path = queue.popleft()
+        menus[path], data = loadMenu(path, levelPath)
+        files, menuThemes = findReferences(data)
+        themes.update(menuThemes)
+        for file in files:
+            if "://" in file:
+                logging.warning("In file \"" + path + "\": Menu \"" + file +
+                                "\" is not local and will be loaded from " +
+                                "its url.")
+                continue
+            reference = os.path.normpath(
+                os.path.join(os.path.dirname(path), file))
+            if reference in seen:
+                continue
+            seen.add(reference)
+            if not os.path.isfile(reference):
+                logging.warning("In file \"" + path + "\": File \"" + file +
+                                "\" not found. Skipped.")
+                continue
+            queue.append(reference)
+
+    return menus, themes
+
+
+def buildBundle(rootPath, mappingPath, bundlePath):
+    rootPath = os.path.abspath(rootPath)
+    menus, themes = collectMenus(rootPath)
+
+    # Menus are stored relative to their common directory, so relative
+    # references between them still work.
+    base = os.path.commonpath([os.path.dirname(path) for path in menus])
+    entries = collections.OrderedDict()
+    for path, content in menus.items():
+        entries[os.path.relpath(path, base).replace(os.sep, "/")] = content
+
+    with open(mappingPath) as mappingFile:
+        mapping = json.load(mappingFile)
+
+    # Themes are taken from theme base of this system and used on all
+    systemType = platform.system()
+    if systemType == "Darwin":
+        systemType = "OS_X"
+    themeBase = mapping.get(systemType, dict()).get("theme_base", "")
+    themeBase = os.path.join(os.path.dirname(os.path.abspath(mappingPath)),
+                             themeBase)
+    for theme in sorted(themes):
+        themePath = os.path.join(themeBase, theme + ".qss")
+        try:
+            with open(themePath, "rb") as themeFile:
+                entries[THEMES_DIR + "/" + theme + ".qss"] = themeFile.read()
+        except IOError:
+            logging.warning("Theme \"" + theme + "\" was not found in \"" +
+                            themeBase + "\". Skipped.")
+    for systemCfg in mapping.values():
+        systemCfg["theme_base"] = THEMES_DIR + "/"
+
+    root = os.path.relpath(rootPath, base).replace(os.sep, "/")
+    write_bundle(bundlePath, root, entries, mapping)
+    return entries
+
+
+def main():
+    """ Main logic """
+
+    currDir = os.path.dirname(os.path.realpath(__file__))
+
+    argsParse = argparse.ArgumentParser(description='Example: pylauncher-bundle menus/menu.json menus.bundle')
+    argsParse.add_argument('configuration',
+                           help="root menu/configuration file")
+    argsParse.add_argument('bundle',
+                           help="bundle file to be written")
+    argsParse.add_argument('-m', '--mapping',
+                           default=os.path.join(currDir, "resources/mapping/mapping.json"),
+                           help="mapping file to be bundled (default: mapping of the launcher)")
+    args = argsParse.parse_args()
+
+    entries = buildBundle(args.configuration, args.mapping, args.bundle)
+    print("Bundled " + str(len(entries)) + " files into " + args.bundle)
+
+
+# Start program here
+if __name__ == '__main__':
+    main()
@@ -8,17 +8,41 @@ import os
 import json
 import codecs
 import argparse
-import pyparsing
+import concurrent.futures
+import hashlib
+import re
+import time
+import shutil
+import tempfile
 import traceback
 
+# Policies for output files which already exist
+CONFLICT_POLICIES = ('skip', 'overwrite', 'if-changed')
+
+
 class LauncherBaseModel(object):
     """Base class to parse launcher config and level files.
 
     It provides methods to parse each line into tokens list.
     """
     # Parser to split the TCL configuration
-    # lines into an list of parameters
-    expr_split = pyparsing.nestedExpr('{', '}')
+    # lines into an list of parameters. Created on first use, since most
+    # lines are split by the faster split_line.
+    expr_split = None
+
+    # Pieces of a line as seen by pyparsing.nestedExpr('{', '}'): whitespace,
+    # quoted string, brace, content characters and a quote which does not
+    # start a quoted string. Quoted strings are matched as by
+    # pyparsing.quotedString: the body is matched greedily without
+    # backtracking ((?=(?P<x>...))(?P=x) is an atomic group) and then
+    # followed by the closing quote.
+    split_pieces = re.compile(
+        r'(?P<space>[ \n\r]+)'
+        r'|(?P<quoted>'
+        r'(?=(?P<dq>"(?:[^"\n\r\\]|(?:"")|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*))(?P=dq)"'
+        r"|(?=(?P<sq>'(?:[^'\n\r\\]|(?:'')|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*))(?P=sq)')"
+        r'|(?P<open>\{)|(?P<close>\})'
+        r"""|(?P<content>[^ \n\r{}"']+|["'])""")
 
     def __init__(self, path):
         """
@@ -41,6 +65,27 @@ class LauncherBaseModel(object):
         :note: The empty lines, comment lines and also lines like
                "{#This is really just comments}" are skipped.
         """
+        for line_number, line in cls.read_lines(file):
+            items = LauncherBaseModel.split_line(line)
+            if items is None:
+                items = LauncherBaseModel.split_line_pyparsing(line)
+
+            # skip empty or comment lines
+            if not items or not items[0] or items[0][0].startswith('#'):
+                continue
+
+            yield line_number, items
+
+    @staticmethod
+    def read_lines(file):
+        """
+        Read lines from file, taking line continuation '\\' into account.
+
+        :param object file: file object to read from
+        :return: (line_number, line) of each line, enclosed in { }
+
+        :note: The empty lines and comment lines are skipped.
+        """
         line_number = 0
         for line in file:
             line = line.strip()
@@ -51,18 +96,65 @@ class LauncherBaseModel(object):
             # skip empty and comment lines
             if not line or line.startswith('#'):
                 continue
-            
+
             # In order for the parser to behave properly we need
             # to add the curly brackets at the front and back of
             # the line.
-            line = '{' + line + '}'
-            items = LauncherBaseModel.expr_split.parseString(line).asList()[0]
+            yield line_number, '{' + line + '}'
 
-            # skip empty or comment lines
-            if not items or not items[0] or items[0][0].startswith('#'):
+    @staticmethod
+    def split_line(line):
+        """Split line into nested list of tokens, using { } as opener/closer.
+
+        Gives the same result as pyparsing.nestedExpr('{', '}'), but is much
+        faster. Returns None for lines it cannot handle (e.g. unbalanced
+        braces), which are then split (and reported) by pyparsing.
+        """
+        # pyparsing expands tabs before parsing
+        line = line.expandtabs()
+        stack = list()
+        content = None
+        for match in LauncherBaseModel.split_pieces.finditer(line):
+            kind = match.lastgroup
+            if kind == 'content':
+                # Adjacent content characters form one token
+                if content is None:
+                    content = match.group()
+                else:
+                    content += match.group()
                 continue
+            if content is not None:
+                if not stack:
+                    return None
+                stack[-1].append(content)
+                content = None
+
+            if kind == 'open':
+                tokens = list()
+                if stack:
+                    stack[-1].append(tokens)
+                stack.append(tokens)
+            elif kind == 'close':
+                if not stack:
+                    return None
+                tokens = stack.pop()
+                if not stack:
+                    # Same as pyparsing, ignore anything after outer list
+                    return tokens
+            elif kind == 'quoted':
+                if not stack:
+                    return None
+                stack[-1].append(match.group())
+
+        return None
 
-            yield line_number, items
+    @staticmethod
+    def split_line_pyparsing(line):
+        """Split line with pyparsing. Slow, but handles any line."""
+        if LauncherBaseModel.expr_split is None:
+            import pyparsing
+            LauncherBaseModel.expr_split = pyparsing.nestedExpr('{', '}')
+        return LauncherBaseModel.expr_split.parseString(line).asList()[0]
 
     def parse(self):
         """Entry method to parse the tickle configuration file.
@@ -224,6 +316,9 @@ class LauncherMenuModel(LauncherBaseModel):
         self.menu_items = list()
         self.json_config = collections.OrderedDict()
         self.file_list = list()
+        # Level names and skipped (missing) files the output depends on
+        self.used_levels = set()
+        self.missing_files = list()
 
         super(LauncherMenuModel, self).__init__(os.path.join(self.dir_path, self.file_name))
 
@@ -282,6 +377,7 @@ class LauncherMenuModel(LauncherBaseModel):
                 if self.force:
                     print('Wrn: File "%s" (referenced in file "%s", line %d) does not exist. Skipping...' 
                             % (filepath, self.file_name, line_number))
+                    self.missing_files.append(command[1] + '.config')
                     return
                 else:
                     print('Err: File "%s" (referenced in file "%s", line %d) does not exist.' 
@@ -331,6 +427,7 @@ class LauncherMenuModel(LauncherBaseModel):
             if item[0] == 'opt:':
                 css.update(self.tkopt_to_css(item[1:]))
             elif item[0] == 'lvl:':
+                self.used_levels.add(item[1])
                 level = self.levels.get(item[1])
                 if level:
                     css.update(level)
@@ -351,45 +448,50 @@ class LauncherMenuModel(LauncherBaseModel):
 
         return d
 
-    def to_json(self, out_path, overwrite=False):
+    def to_json(self, staging_path, out_path, conflict='skip'):
         """Mehod to output internal data into the JSON file.
 
         This method outputs the parsed configuration data into the JSON
-        file. If the file already exists the user is asked if it should
-        be overwritten or not. The overwrite flag parameter specifies
-        if the files should be overwritten without asking the user.
+        file in the staging folder, from where it is later moved to the
+        output folder. The conflict policy specifies what is done if the
+        output file already exists and its content differs (identical
+        files are never rewritten):
+            skip: the existing file is kept
+            overwrite: the existing file is overwritten
+            if-changed: the existing file is overwritten
+
+        Returns 'written', 'unchanged', 'skipped' or None on error.
         """
         split = os.path.splitext(self.file_name)
         if not split[1]:
             print('Err: Unable to parse extension from file name: %s' % self.file_name)
-            return
+            return None
 
         out_file = os.path.join(out_path, split[0] + '.json')
-        print('Inf: Writing file: %s' % out_file)
 
         if os.path.isdir(out_file):
             print('Err: Output file "%s" is a directory!' % out_file)
-            return
-
-        if os.path.isfile(out_file):
-            if not overwrite:
-                print('Wrn: Output file "%s" already exists!' % out_file)
-
-                while True:
-                    user_input = input('Overwrite? [y/N]:')
-                    if user_input == 'y' or user_input == 'Y':
-                        break
-                    elif (user_input == 'n' or
-                          user_input == 'N' or
-                          not user_input):
-                        return
+            return None
 
         # Set the item list to the menu key in the top dictionary
         self.json_config['menu'] = self.menu_items
+        content = json.dumps(self.json_config, indent=4)
+
+        if os.path.isfile(out_file):
+            # Identical files are never rewritten, so their modification
+            # time is kept with any policy
+            with codecs.open(out_file, encoding='utf-8') as output_file:
+                if output_file.read() == content:
+                    return 'unchanged'
+
+            if conflict == 'skip':
+                print('Wrn: Output file "%s" already exists. Skipping...' % out_file)
+                return 'skipped'
 
-        with codecs.open(out_file, mode='w', encoding='utf-8') as output_file:
-            json.dump(self.json_config, output_file, indent=4)
-            output_file.close()
+        staged_file = os.path.join(staging_path, split[0] + '.json')
+        with codecs.open(staged_file, mode='w', encoding='utf-8') as output_file:
+            output_file.write(content)
+        return 'written'
 
     def get_file_list(self):
         """Method to get the list of menu files that this menu
@@ -404,15 +506,23 @@ class LauncherMenuModelParser(object):
     Holds information about the files that have been already parsed and
     those who still need to be. After each new menu file is parsed the
     list of files is extended with the menu's dependencies.
+
+    A manifest in the output folder records for each converted file the
+    hash of its content, its output and everything else its output depends
+    on (referenced and missing files, used levels). Files which did not
+    change since the last conversion are not parsed again.
     """
 
-    def __init__(self, input_file, output_path, level_file=None, overwrite=False):
+    manifest_name = '.pylauncher-convert.json'
+
+    def __init__(self, input_file, output_path, level_file=None, conflict='skip',
+                 rebuild=False):
 
         # Split path into filename and directory path
         self.input_file_path, input_file_name = os.path.split(input_file)
 
         self.output_path = output_path
-        self.overwrite = overwrite
+        self.conflict = conflict
 
         self.input_files = collections.OrderedDict()
 
@@ -423,67 +533,235 @@ class LauncherMenuModelParser(object):
         self.levels = {}
         if level_file is None:
             level_file = os.path.join(self.input_file_path, os.path.splitext(input_file_name)[0] + '.lvl')
+        self.level_file = level_file
         if os.path.exists(level_file):
             self.levels = LauncherLevelModel(level_file).levels
 
+        self.level_hashes = dict()
+        for name, definition in self.levels.items():
+            self.level_hashes[name] = hashlib.sha1(json.dumps(
+                definition, sort_keys=True).encode('utf-8')).hexdigest()
+
+        self.manifest_path = os.path.join(output_path, self.manifest_name)
+        self.manifest = {'version': 1, 'levels': {}, 'files': {}}
+        if not rebuild and os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path) as manifest_file:
+                    manifest = json.load(manifest_file)
+                if manifest.get('version') == 1:
+                    self.manifest = manifest
+            except ValueError:
+                print('Wrn: Manifest "%s" is corrupted. Converting all files.'
+                      % self.manifest_path)
+
+        self.file_hashes = dict()
+        self.file_lists = dict()
+
+    def file_hash(self, input_file_name):
+        with open(os.path.join(self.input_file_path, input_file_name), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def is_up_to_date(self, input_file_name, force):
+        """Check if file was converted and nothing it depends on changed."""
+        entry = self.manifest['files'].get(input_file_name)
+        if entry is None or entry['force'] != force:
+            return False
+        try:
+            self.file_hashes[input_file_name] = self.file_hash(input_file_name)
+        except IOError:
+            return False  # Reported by parsing
+        if self.file_hashes[input_file_name] != entry['hash']:
+            return False
+        if not os.path.isfile(os.path.join(self.output_path, entry['output'])):
+            return False
+        for level in entry['levels']:
+            if self.level_hashes.get(level) != self.manifest['levels'].get(level):
+                return False
+        for missing_file in entry['missing']:
+            if os.path.isfile(os.path.join(self.input_file_path, missing_file)):
+                return False
+        return True
+
     # Parse requested files
-    def parse(self, single=False, force=True):
+    def parse(self, single=False, force=True, jobs=1):
         """Method for recursive file parsing and tracking files.
 
         This method starts by parsing the configuration file that the user
         provided and continues to parse its dependent files if recursive
         parsing is enabled (it is by default).
-        """
-        finished = False
-
-        while not finished:
-
-            input_file_name = None
 
-            # Check if we parsed all files and get the next
-            # in line to be parsed
-            for key, value in self.input_files.items():
-                if not value:
-                    input_file_name = key
-                    break
+        Files are taken from a work queue and each file is queued only
+        once. With jobs > 1 files are parsed in a pool of processes and
+        files referenced from a parsed file are queued as soon as it is
+        parsed. The result does not depend on the number of jobs.
 
-            # If we parsed all of them, stop
-            if not input_file_name:
-                finished = True
-                print('Inf: Successfully finished parsing!')
-                continue
-
-            # Parse the current file
-            menu_model = LauncherMenuModel(self.input_file_path,
-                                           input_file_name,
-                                           self.levels,
-                                           force)
+        Files which are up to date are not parsed, their model is None.
+        """
+        self.force = force
+        root_file_name = next(iter(self.input_files))
+        models = dict()
 
-            # Store the file parsed model
-            self.input_files[input_file_name] = menu_model
+        queue = collections.deque([root_file_name])
+        seen = set(queue)
+        pending = dict()
 
+        def parsed(input_file_name, file_list):
+            self.file_lists[input_file_name] = file_list
             # If we do not want to parse any additional files, stop
-            if(single):
+            if single:
+                return
+            # Queue all depending files that have not been seen yet
+            for input_file in file_list:
+                if input_file not in seen:
+                    seen.add(input_file)
+                    queue.append(input_file)
+
+        executor = None
+        if jobs > 1 and not single:
+            executor = concurrent.futures.ProcessPoolExecutor(jobs)
+        try:
+            while queue or pending:
+                while queue:
+                    input_file_name = queue.popleft()
+                    if self.is_up_to_date(input_file_name, force):
+                        models[input_file_name] = None
+                        parsed(input_file_name,
+                               self.manifest['files'][input_file_name]['refs'])
+                    elif executor is not None:
+                        pending[executor.submit(
+                            LauncherMenuModel, self.input_file_path,
+                            input_file_name, self.levels, force)] = input_file_name
+                    else:
+                        models[input_file_name] = LauncherMenuModel(
+                            self.input_file_path, input_file_name, self.levels,
+                            force)
+                        parsed(input_file_name,
+                               models[input_file_name].get_file_list())
+
+                if pending:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        input_file_name = pending.pop(future)
+                        models[input_file_name] = future.result()
+                        parsed(input_file_name,
+                               models[input_file_name].get_file_list())
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # Store parsed models in the same order as they would be parsed one
+        # after another, so the output is always the same.
+        self.input_files = collections.OrderedDict()
+        order = [root_file_name]
+        # Files in order, the list is only used for the order
+        ordered = set(order)
+        for input_file_name in order:
+            self.input_files[input_file_name] = models[input_file_name]
+            if single:
                 break
+            for input_file in self.file_lists[input_file_name]:
+                if input_file not in ordered:
+                    ordered.add(input_file)
+                    order.append(input_file)
 
-            # Get list of all depending files that have been
-            # detected during parsing of the configuration
-            file_list = menu_model.get_file_list()
-
-            # Add any files not yet present in the dictionary to it
-            for input_file in file_list:
-                if input_file not in self.input_files.keys():
-                    self.input_files[input_file] = None
+        print('Inf: Successfully finished parsing!')
 
     def to_json(self):
         """Mehod to output menu data into the JSON file.
 
         This method outputs the parsed file contents converted into JSON
-        format for each file that was parsed.
+        format for each file that was parsed and updates the manifest.
+        All files are first written to a staging folder inside the output
+        folder and then moved to the output folder, so an interrupted
+        conversion does not leave partially written files.
+
+        Returns dictionary with lists of written, unchanged and skipped
+        output files.
         """
-        for key in self.input_files.keys():
-            # Output the configuration to the json output file
-            self.input_files[key].to_json(self.output_path, self.overwrite)
+        report = collections.OrderedDict(
+            [('written', []), ('unchanged', []), ('skipped', [])])
+        files = self.manifest['files']
+        # Outputs of previous conversions are replaced when they change, the
+        # conflict policy applies only to files the converter did not write.
+        own_outputs = set(entry['output'] for entry in files.values())
+        staging_path = tempfile.mkdtemp(prefix='.pylauncher-convert-',
+                                        dir=self.output_path)
+        try:
+            for key, menu_model in self.input_files.items():
+                if menu_model is None:
+                    continue  # Up to date
+
+                # Output the configuration to the json output file
+                output = os.path.splitext(key)[0] + '.json'
+                conflict = self.conflict
+                if conflict == 'skip' and output in own_outputs:
+                    conflict = 'if-changed'
+                result = menu_model.to_json(staging_path, self.output_path,
+                                            conflict)
+                if result is not None:
+                    report[result].append(output)
+
+                if result in ('written', 'unchanged'):
+                    if key not in self.file_hashes:
+                        self.file_hashes[key] = self.file_hash(key)
+                    files[key] = {
+                        'hash': self.file_hashes[key],
+                        'output': output,
+                        'force': self.force,
+                        'refs': menu_model.get_file_list(),
+                        'missing': menu_model.missing_files,
+                        'levels': sorted(menu_model.used_levels),
+                    }
+                else:
+                    files.pop(key, None)
+
+            manifest = {'version': 1, 'levels': self.level_hashes, 'files': files}
+            with open(os.path.join(staging_path, self.manifest_name), 'w') as manifest_file:
+                json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+
+            # Publish. Manifest is moved last, so it never describes files
+            # which were not published.
+            for out_file in report['written']:
+                print('Inf: Writing file: %s' % os.path.join(self.output_path, out_file))
+                os.replace(os.path.join(staging_path, out_file),
+                           os.path.join(self.output_path, out_file))
+            os.replace(os.path.join(staging_path, self.manifest_name),
+                       self.manifest_path)
+        finally:
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+        print('Inf: %d written, %d unchanged, %d skipped.' % (
+            len(report['written']), len(report['unchanged']),
+            len(report['skipped'])))
+        return report
+
+    def watched_files(self):
+        """Return all files that changes of should trigger new conversion."""
+        files = [self.level_file]
+        for key in self.input_files:
+            files.append(os.path.join(self.input_file_path, key))
+            entry = self.manifest['files'].get(key)
+            if entry:
+                files.extend(os.path.join(self.input_file_path, missing_file)
+                             for missing_file in entry['missing'])
+        return files
+
+
+def get_file_states(files):
+    states = dict()
+    for path in files:
+        try:
+            stat = os.stat(path)
+            states[path] = (stat.st_mtime, stat.st_size)
+        except OSError:
+            states[path] = None
+    return states
+
 
 def main():
 
@@ -492,14 +770,28 @@ def main():
                            help='TCL configuration script to be converted')
     args_pars.add_argument('outputfolder',
                            help='folder where the converted json file will be stored')
-    args_pars.add_argument('-o', '--overwrite', action='store_true',
-                           help='overwrite output files that already exist')
+    args_pars.add_argument('--conflict', choices=CONFLICT_POLICIES, default='skip',
+                           help='what to do with output files that already exist: keep them (skip), '
+                                'overwrite them (overwrite) or overwrite them if their content '
+                                'differs (if-changed). Files written by a previous conversion are '
+                                'always overwritten if changed. (default: skip)')
+    args_pars.add_argument('-o', '--overwrite', dest='conflict', action='store_const',
+                           const='overwrite', help='same as --conflict overwrite')
     args_pars.add_argument('-s', '--single', action='store_true',
                            help='convert only a single file (nonrecursive)')
     args_pars.add_argument('-f', '--force', action='store_true',
                            help='continue even if some files cannot be found')
     args_pars.add_argument('--level',
                            help='launcher level definition file. (default: <inputfile>.lvl)')
+    args_pars.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                           help='number of files parsed in parallel (default: number of CPUs)')
+    args_pars.add_argument('--rebuild', action='store_true',
+                           help='convert all files, even if they did not change since last conversion')
+    args_pars.add_argument('-w', '--watch', action='store_true',
+                           help='keep running and convert files whenever they change (implies --conflict if-changed, '
+                                'unless overwrite is set)')
+    args_pars.add_argument('--watch-interval', type=float, default=1.0,
+                           help='seconds between checks for changes in watch mode (default: 1)')
 
     args = args_pars.parse_args()
 
@@ -514,9 +806,32 @@ def main():
         print('Output path "%s" is not a directory!' % output_path)
         sys.exit(-1)
 
-    parser = LauncherMenuModelParser(tickle_path, output_path, args.level, args.overwrite)
-    parser.parse(args.single, args.force)
-    parser.to_json()
+    if not args.watch:
+        parser = LauncherMenuModelParser(tickle_path, output_path, args.level,
+                                         args.conflict, args.rebuild)
+        parser.parse(args.single, args.force, args.jobs)
+        parser.to_json()
+        return
+
+    conflict = args.conflict
+    if conflict == 'skip':
+        conflict = 'if-changed'
+    watched_files = [tickle_path]
+    rebuild = args.rebuild
+    while True:
+        try:
+            parser = LauncherMenuModelParser(tickle_path, output_path,
+                                             args.level, conflict, rebuild)
+            parser.parse(args.single, args.force, args.jobs)
+            parser.to_json()
+            watched_files = parser.watched_files()
+            rebuild = False
+        except SystemExit:
+            print('Err: Conversion failed. Waiting for changes...')
+
+        states = get_file_states(watched_files)
+        while get_file_states(watched_files) == states:
+            time.sleep(args.watch_interval)
 
 
 if __name__ == '__main__':
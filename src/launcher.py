@@ -6,24 +6,71 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
 
 import platform
-import argparse
-import copy
 import enum
-import shlex
-import subprocess
-import hashlib
 import sys
+import json
+import time
+import argparse
+import threading
+import collections
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Not available on Windows
 
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QDesktopServices, QIcon, QCursor, QKeySequence
 from PyQt5.QtWidgets import QMainWindow, QMenu, QWidgetAction, QLineEdit, QWidget, QHBoxLayout, QToolButton, QVBoxLayout, QCheckBox, QAction, QLabel, QPushButton, QApplication, QInputDialog, QMessageBox
+from PyQt5.QtNetwork import QLocalServer
 
 from .launcher_model import *
+from .launcher_spawn import spawn_cmd, launch_guard, load_action, \
+    check_executable, get_path_signature
+from .launcher_telemetry import launch_log
+from .launcher_usage import usage_store
+from .launcher_password import check_password, unlock_cache
+from .launcher_cli import get_args_parser, load_configuration
+from .launcher_daemon import get_socket_path
 
 import signal
 signal.signal(signal.SIGINT, signal.SIG_DFL)
 
+# Time in seconds for building widgets between processing of events, below
+# one frame at 60 Hz.
+BUILD_SLICE_TIME = 0.01
+# Time in seconds of one step of idle warming and time in ms without user
+# input after which warming continues.
+WARM_SLICE_TIME = 0.005
+WARM_IDLE_DELAY = 200
+# Time in ms after a view is shown or window activated until programs of
+# commands are checked, so the check does not delay showing the window.
+EXECUTABLE_CHECK_DELAY = 500
+
+
+def boostItems(items, scores):
+    """Return items with higher scored items first within each section.
+
+    Sections are separated by titles and separators, which stay in place.
+    Order of items with equal score is kept.
+    """
+
+    boosted = list()
+    section = list()
+    for item in items:
+        if item.__class__.__name__ in ("launcher_title_item",
+                                       "launcher_item_separator"):
+            section.sort(key=lambda i: -scores.get(i.get_id(), 0))
+            boosted.extend(section)
+            boosted.append(item)
+            section = list()
+        else:
+            section.append(item)
+    section.sort(key=lambda i: -scores.get(i.get_id(), 0))
+    boosted.extend(section)
+    return boosted
+
 
 def stringContains(string, substring, caseSensitive):
     if caseSensitive:
@@ -32,17 +79,32 @@ def stringContains(string, substring, caseSensitive):
         return substring.lower() in string.lower()
 
 
-def convertPwdToHash(password):
-    m = hashlib.md5()
-    m.update(password.encode())
-    return m.hexdigest()
+def getUnlockCache(widget):
+    """Return passwords entered in launcher window of widget.
+
+    Each window has its own cache, so windows of a daemon do not unlock each
+    other.
+    """
+
+    while not isinstance(widget, LauncherWindow):
+        widget = widget.parent()
+    return widget.unlockCache
 
 
 def verifyPassword(object, password):
+    """Ask for password unless it was entered recently in the same window.
+
+    password is the hash stored in the menu file.
+    """
+
+    unlockCache = getUnlockCache(object)
+    if unlockCache.is_unlocked(password):
+        return True
+
     passwordInput = showPasswordDialog(object)
     if passwordInput is not None:
-        convertedPwd = convertPwdToHash(passwordInput)
-        if convertedPwd == password:
+        if check_password(passwordInput, password):
+            unlockCache.unlock(password)
             return True
         else:
             showWrongPasswordDialog(object)
@@ -81,11 +143,36 @@ class LauncherWindow(QMainWindow):
     """Launcher main window.
 
     Main launcher window. At initialization recursively builds visualization
-    of launcher menus, builds menu bar, ...
+    of launcher menus, builds menu bar, ... If progressive, the window is
+    ready to be shown before the menu is loaded, the menu is then loaded in
+    background and shown when built.
     """
 
-    def __init__(self, rootFilePath, cfg, parent=None):
+    # Passed from background thread when menu model is parsed
+    modelLoaded = QtCore.pyqtSignal(object)
+    # Menu is built and shown
+    menuLoaded = QtCore.pyqtSignal()
+    # Menu cannot be loaded or its password was not entered
+    loadFailed = QtCore.pyqtSignal()
+    # Passed from background thread with {command: reason why it cannot be
+    # started or None} of checked commands
+    executablesChecked = QtCore.pyqtSignal(object)
+    # Passed from background thread with (warming generation, view key,
+    # model, files, signature, items) of each parsed view
+    viewModelLoaded = QtCore.pyqtSignal(object)
+
+    def __init__(self, rootFilePath, cfg, parent=None, launchLog=None,
+                 progressive=False, usage=None):
         QMainWindow.__init__(self, parent)
+        # Launches are counted in usage to offer frequently used items
+        self.usage = usage
+        # Started processes are watched to record their exit in launch log
+        self.launchLog = launchLog
+        self.processes = list()
+        self.processTimer = QtCore.QTimer(self)
+        self.processTimer.setInterval(1000)
+        self.processTimer.timeout.connect(self.checkProcesses)
+
         # Get configuration for current system. platform.system() returns:
         #     - "Darwin" when OS X
         #     - "Linux" when Linux
@@ -104,18 +191,34 @@ class LauncherWindow(QMainWindow):
         # relative to config file.
 
         theme_base = self.launcherCfg["theme_base"]
-        try:
-            urlopen(theme_base)
-        except (URLError, ValueError):
+        if "://" not in theme_base:
             # Not an url. Check if absolute path.
 
             if not os.path.isabs(theme_base):
                 self.launcherCfg["theme_base"] = os.path.join(cfg["cfg_base"],
                                                               theme_base)
 
-        self.menuModel = self.buildMenuModel(rootFilePath)
-
-        self.setWindowTitle(self.menuModel.main_title.text)
+        self.launchGuard = launch_guard()
+        # Passwords entered in this window. Timeout is set from root menu
+        # flags.
+        self.unlockCache = unlock_cache()
+        # Environment and working directory of started commands, None for
+        # the ones of the launcher. Daemon sets the ones of its client.
+        self.launchEnvironment = None
+        self.launchCwd = None
+        self.menuModel = None
+        self.launcherMenu = None
+        # Results of checks of programs of commands, see checkExecutables
+        self.executableReasons = dict()
+        self.executableCheck = None
+        self.executableCheckPending = False
+        self.executableTimer = QtCore.QTimer(self)
+        self.executableTimer.setSingleShot(True)
+        self.executableTimer.setInterval(EXECUTABLE_CHECK_DELAY)
+        self.executableTimer.timeout.connect(self.startExecutableCheck)
+        self.executablesChecked.connect(self.setExecutableReasons)
+
+        self.setWindowTitle("Loading...")
         # QMainWindow has predefined layout. Content should be in the central
         # widget. Create widget with a QVBoxLayout and set it as central.
 
@@ -124,17 +227,14 @@ class LauncherWindow(QMainWindow):
         self.mainLayout.setContentsMargins(0, 0, 0, 0)
         self.setCentralWidget(mainWidget)
         # Main window consist of filter/search entry and a main button which
-        # pops up the root menu. Create a layout and add the items.
-
-        self.launcherMenu = LauncherSubMenu(self.menuModel, None, mainWidget)
-        self.mainButton = LauncherMainButton(self.launcherMenu, mainWidget)
-        self.launcherMenu.button = self.mainButton
-        # Create Filter/search item. Add it and main button to the layout.
-
-        self.use_sbox = self.menuModel.flags.get('search-box-enabled', True)
-        if self.use_sbox:
-            self.searchInput = LauncherFilterWidget(self.launcherMenu, mainWidget)
-            self.mainLayout.addWidget(self.searchInput)
+        # pops up the root menu. Create a layout and add the items. Until
+        # menu is loaded, main button shows loading and filter input is only
+        # stored.
+
+        self.mainButton = LauncherMainButton(None, mainWidget)
+        self.use_sbox = True
+        self.searchInput = LauncherFilterWidget(None, mainWidget)
+        self.mainLayout.addWidget(self.searchInput)
         self.mainLayout.addWidget(self.mainButton)
         # Create menu bar. In current visualization menu bar exposes all
         # LauncherFileChoiceItem items from the model. They are exposed in
@@ -143,58 +243,406 @@ class LauncherWindow(QMainWindow):
         menuBar = self.menuBar()
 
         self.viewMenu = LauncherViewMenu("&View", menuBar)
-        self.viewMenu.buildViewMenu(self.menuModel)
         menuBar.addMenu(self.viewMenu)
+        self.frequentMenu = LauncherFrequentMenu("F&requent", menuBar)
+        self.frequentMenu.menuAction().setVisible(False)
+        menuBar.addMenu(self.frequentMenu)
 
         # Set mouse tracking
         self.setMouseTracking(True)
         mainWidget.setMouseTracking(True)
         self.mainButton.setMouseTracking(True)
+        self.searchInput.setMouseTracking(True)
+
+        # Recently used views {key: (model, menu, files, signature, items)},
+        # least recently used first
+        self.viewCache = collections.OrderedDict()
+        self.viewFiles = list()
+        self.viewSignature = list()
+
+        self.warmer = LauncherIdleWarmer(self)
+        # Increased when warming starts again, views parsed for previous
+        # warming are dropped
+        self.warmGeneration = 0
+        self.viewModelLoaded.connect(self.warmViewModel)
+
+        self.menuBuilder = None
+        self.buildTimer = QtCore.QTimer(self)
+        self.buildTimer.setInterval(0)
+        self.buildTimer.timeout.connect(self.buildMenuSlice)
+        self.modelLoaded.connect(self.setMenuModel)
+
+        if progressive:
+            # Window can be shown while model is parsed in background and
+            # widgets are built in slices on the event loop.
+            loader = threading.Thread(target=self.loadMenuModel,
+                                      args=(rootFilePath,), daemon=True)
+            loader.start()
+        else:
+            self.menuModel = self.buildMenuModel(rootFilePath)
+            self.launcherMenu = LauncherSubMenu(self.menuModel, None,
+                                                mainWidget)
+            self.launcherMenu.button = self.mainButton
+            self.showMenu()
 
-        if self.use_sbox:
-            self.searchInput.setMouseTracking(True)
+            if self.menuModel.password is not None:
+                if not verifyPassword(self, self.menuModel.password):
+                    sys.exit(-1)
+
+    def loadMenuModel(self, rootFilePath):
+        """Parse menu model and pass it to the GUI thread.
+
+        Runs in a background thread. None is passed if menu cannot be
+        loaded, reason is already reported by the parser.
+        """
+
+        try:
+            menuModel = self.buildMenuModel(rootFilePath)
+        except SystemExit:
+            menuModel = None
+        except Exception:
+            logging.exception("Menu \"" + rootFilePath +
+                              "\" cannot be loaded.")
+            menuModel = None
 
+        try:
+            self.modelLoaded.emit(menuModel)
+        except RuntimeError:
+            pass  # Window was closed and deleted meanwhile
+
+    def setMenuModel(self, menuModel):
+        """Start building widgets of model loaded in background."""
+
+        if menuModel is None:
+            self.loadFailed.emit()
+            return
+
+        self.menuModel = menuModel
         if self.menuModel.password is not None:
             if not verifyPassword(self, self.menuModel.password):
-                sys.exit(-1)
+                self.loadFailed.emit()
+                return
+
+        self.launcherMenu = LauncherSubMenu(self.menuModel, None,
+                                            self.centralWidget(), build=False)
+        self.launcherMenu.button = self.mainButton
+        self.menuBuilder = self.launcherMenu.buildMenuSteps()
+        self.buildTimer.start()
+
+    def buildMenuSlice(self):
+        """Build widgets until time of one slice is used.
+
+        Events (input, painting) are processed between the slices, so the
+        window never blocks for more than a frame.
+        """
+
+        deadline = time.perf_counter() + BUILD_SLICE_TIME
+        for _ in self.menuBuilder:
+            if time.perf_counter() > deadline:
+                return
+        self.buildTimer.stop()
+        self.menuBuilder = None
+        self.showMenu()
+
+    def showMenu(self):
+        """Show built menu in main window and apply stored filter input."""
+
+        self.configureLaunchGuard()
+        self.viewFiles = get_menu_files(self.menuModel)
+        self.viewSignature = get_files_signature(self.viewFiles)
+        self.setWindowTitle(self.menuModel.main_title.text)
+        self.mainButton.restyle(self.menuModel.main_title)
+        self.mainButton.setMenu(self.launcherMenu)
+        self.mainButton.setEnabled(True)
+        self.viewMenu.buildViewMenu(self.menuModel)
+        self.frequentMenu.menuAction().setVisible(
+            self.usage is not None and
+            self.menuModel.flags.get("frequent-items", 10) > 0)
+
+        self.use_sbox = self.menuModel.flags.get('search-box-enabled', True)
+        if self.use_sbox:
+            self.searchInput.setMenu(self.launcherMenu)
+        else:
+            self.searchInput.hide()
+        self.startWarming()
+        self.checkExecutables()
+        self.menuLoaded.emit()
 
     def setNewView(self, rootMenuFile, text=None):
-        """Rebuild launcher from new config file.
+        """Show launcher for new config file.
 
-        Destroy previous model and create new one. Build menus and edit main
-        window elements.
+        Recently used views are kept in a cache, so switching back to them
+        does not parse and build them again. A cached view is used only if
+        none of its files was changed since it was built. Otherwise new model
+        is created and its menus are built.
         """
-        self.menuModel.choice_element.text = self.windowTitle()
-        self.viewMenu.addToHistory(self.menuModel.choice_element)
-        del self.menuModel
 
-        self.menuModel = self.buildMenuModel(rootMenuFile)
+        launcherBase = self.launcherCfg.get("launcher_base")
+        rootMenuFullPath = join_launcher_path(launcherBase, rootMenuFile)
+        viewKey = normalize_menu_path(rootMenuFullPath)
+        cachedView = self.viewCache.pop(viewKey, None)
+        if cachedView is not None and \
+                get_files_signature(cachedView[2]) != cachedView[3]:
+            cachedView[1].deleteLater()
+            cachedView = None
+
+        if cachedView is not None:
+            menuModel, launcherMenu, menuFiles, signature, _ = cachedView
+            self.launcherCfg["launcher_base"] = os.path.dirname(
+                rootMenuFullPath)
+        else:
+            try:
+                menuModel = self.buildMenuModel(rootMenuFile)
+                menuFiles = get_menu_files(menuModel)
+                signature = get_files_signature(menuFiles)
+            except SystemExit:
+                # Reason was already reported, current view is kept
+                self.launcherCfg["launcher_base"] = launcherBase
+                return
+            except Exception:
+                logging.exception("View \"" + rootMenuFile +
+                                  "\" cannot be loaded.")
+                self.launcherCfg["launcher_base"] = launcherBase
+                return
+            launcherMenu = None
 
-        if self.menuModel.password is not None:
-            if not verifyPassword(self, self.menuModel.password):
+        if menuModel.password is not None:
+            if not verifyPassword(self, menuModel.password):
+                self.launcherCfg["launcher_base"] = launcherBase
+                if cachedView is not None:
+                    self.viewCache[viewKey] = cachedView
                 return
 
+        self.menuModel.choice_element.text = self.windowTitle()
+        self.viewMenu.addToHistory(self.menuModel.choice_element)
+        self.cacheView()
+
+        self.menuModel = menuModel
+        self.viewFiles = menuFiles
+        self.viewSignature = signature
         if text:
             self.setWindowTitle(text)
         else:
             self.setWindowTitle(self.menuModel.main_title.text)
         self.mainButton.restyle(self.menuModel.main_title)
-        self.launcherMenu.deleteLater()
-        self.launcherMenu = LauncherSubMenu(self.menuModel, self.mainButton,
-                                            self)
+        if launcherMenu is None:
+            launcherMenu = LauncherSubMenu(self.menuModel, self.mainButton,
+                                           self)
+        self.launcherMenu = launcherMenu
         self.mainButton.setMenu(self.launcherMenu)
         self.viewMenu.buildViewMenu(self.menuModel)
+        self.frequentMenu.menuAction().setVisible(
+            self.usage is not None and
+            self.menuModel.flags.get("frequent-items", 10) > 0)
 
         self.use_sbox = self.menuModel.flags.get('search-box-enabled', True)
         if self.use_sbox:
            self.searchInput.setMenu(self.launcherMenu)
+        self.configureLaunchGuard()
+        self.startWarming()
+        self.checkExecutables()
+
+    def startWarming(self):
+        """Prepare root menu, its submenus and views of current view.
+
+        Done only while the launcher is idle, if "idle-warming" flag is set.
+        """
+
+        self.warmer.clear()
+        self.warmer.enabled = self.menuModel.flags.get("idle-warming", True)
+        self.warmer.schedule(self.launcherMenu.warmSteps())
+        for action in self.launcherMenu.actions():
+            if isinstance(action, LauncherMenuWidgetAction) and \
+                    isinstance(action.defaultWidget(), LauncherMenuButton):
+                self.warmer.schedule(action.defaultWidget().menu().warmSteps())
+        self.warmGeneration += 1
+        views = collections.OrderedDict()
+        currentKey = normalize_menu_path(self.menuModel.menu_path)
+        for view in self.menuModel.file_choices:
+            rootMenuFullPath = join_launcher_path(
+                self.launcherCfg.get("launcher_base"), view.root_menu_file)
+            viewKey = normalize_menu_path(rootMenuFullPath)
+            if viewKey not in self.viewCache and viewKey != currentKey:
+                views.setdefault(viewKey, rootMenuFullPath)
+        if views:
+            self.warmer.schedule(self.startViewLoader(list(views.items())))
+
+    def startViewLoader(self, views):
+        """Start parsing views in background when the launcher is idle."""
+
+        loader = threading.Thread(
+            target=self.loadViewModels,
+            args=(self.warmGeneration, views, dict(self.launcherCfg)),
+            daemon=True)
+        loader.start()
+        yield
+
+    def loadViewModels(self, generation, views, launcherCfg):
+        """Parse views one by one and pass them to the GUI thread.
+
+        Runs in a background thread, so parsing never blocks the window.
+        Stops when warming was started again meanwhile.
+        """
+
+        for viewKey, rootMenuFullPath in views:
+            if generation != self.warmGeneration:
+                return
+            try:
+                menuModel = launcher_menu_model(None, rootMenuFullPath, 0,
+                                                launcherCfg)
+                menuFiles = get_menu_files(menuModel)
+                signature = get_files_signature(menuFiles)
+                items = count_menu_items(menuModel)
+            except (Exception, SystemExit):
+                continue  # Reported again if view is selected
+
+            try:
+                self.viewModelLoaded.emit((generation, viewKey, menuModel,
+                                           menuFiles, signature, items))
+            except RuntimeError:
+                return  # Window was closed and deleted meanwhile
+
+    def warmViewModel(self, view):
+        """Schedule building of view parsed in background."""
+
+        generation, viewKey, menuModel, menuFiles, signature, items = view
+        if generation != self.warmGeneration:
+            return
+        self.warmer.schedule(self.warmView(viewKey, menuModel, menuFiles,
+                                           signature, items))
+
+    def warmView(self, viewKey, menuModel, menuFiles, signature, items):
+        """Build parsed view into the cache of views, step by step.
+
+        View is added only if the cache stays within its item budget. It is
+        added as least recently used, so it is the first to be dropped.
+        """
+
+        budget = self.menuModel.flags.get("view-cache-items", 5000)
+        if viewKey in self.viewCache or \
+                sum(view[4] for view in self.viewCache.values()) + items > \
+                budget:
+            return
+        yield
+
+        launcherMenu = LauncherSubMenu(menuModel, self.mainButton, self,
+                                       build=False)
+        for step in launcherMenu.buildMenuSteps():
+            yield step
+        if viewKey in self.viewCache:
+            launcherMenu.deleteLater()  # Was cached meanwhile
+            return
+        self.viewCache[viewKey] = (menuModel, launcherMenu, menuFiles,
+                                   signature, items)
+        self.viewCache.move_to_end(viewKey, last=False)
+
+    def cacheView(self):
+        """Keep current view in the cache of views.
+
+        Views which were not used for longest time are removed when the
+        views hold more items than the "view-cache-items" flag allows.
+        """
+
+        # Detached menus and search windows of the view are closed as they
+        # would be if the view was destroyed.
+        self.launcherMenu.hideAll()
+        for child in self.launcherMenu.children():
+            if isinstance(child, (LauncherDetachedMenu,
+                                  LauncherSearchMenuView)):
+                child.deleteLater()
+
+        self.viewCache[normalize_menu_path(self.menuModel.menu_path)] = (
+            self.menuModel, self.launcherMenu, self.viewFiles,
+            self.viewSignature, count_menu_items(self.menuModel))
+
+        budget = self.menuModel.flags.get("view-cache-items", 5000)
+        while self.viewCache and \
+                sum(view[4] for view in self.viewCache.values()) > budget:
+            _, view = self.viewCache.popitem(last=False)
+            view[1].deleteLater()
+
+    def checkExecutables(self):
+        """Disable items of current view whose program is not installed.
+
+        Programs are looked up on PATH in background, shortly after the
+        view is shown. Lookups are cached until PATH or one of its
+        directories changes, so the check is repeated cheaply each time the
+        window is activated. Disabled with "check-executables" flag.
+        """
+
+        if self.launcherMenu is None:
+            return
+        if self.menuModel.flags.get("check-executables", True):
+            self.executableTimer.start()
+        else:
+            self.executableReasons = dict()
+
+    def setLaunchContext(self, environment, cwd):
+        """Start commands with environment in cwd, None for the ones of the
+        launcher."""
+
+        changed = environment != self.launchEnvironment
+        self.launchEnvironment = environment
+        self.launchCwd = cwd
+        if changed:
+            self.checkExecutables()  # Programs are looked up on new PATH
+
+    def startExecutableCheck(self):
+        if self.executableCheck is not None and \
+                self.executableCheck.is_alive():
+            self.executableCheckPending = True
+            return
+
+        cmds = {button.cmd for button in self.iterCmdButtons()
+                if not isinstance(button, LauncherActionButton)}
+        path = (self.launchEnvironment or os.environ).get("PATH", os.defpath)
+        self.executableCheck = threading.Thread(
+            target=self.resolveExecutables, args=(cmds, path), daemon=True)
+        self.executableCheck.start()
+
+    def resolveExecutables(self, cmds, path):
+        """Check programs of cmds on path and pass results to the GUI thread.
+
+        Runs in a background thread.
+        """
+
+        signature = get_path_signature(path)
+        reasons = {cmd: check_executable(cmd, signature) for cmd in cmds}
+        try:
+            self.executablesChecked.emit(reasons)
+        except RuntimeError:
+            pass  # Window was closed and deleted meanwhile
+
+    def setExecutableReasons(self, reasons):
+        self.executableReasons.update(reasons)
+        # Other menus are updated when they are shown
+        for menu in QApplication.topLevelWidgets():
+            if isinstance(menu, LauncherMenu) and menu.isVisible():
+                menu.applyExecutableReasons()
+
+        if self.executableCheckPending:
+            # View was changed while checking
+            self.executableCheckPending = False
+            self.startExecutableCheck()
+
+    def configureLaunchGuard(self):
+        """Apply "launch-cooldown", "launch-rate-limit" and "unlock-timeout"
+        flags."""
+
+        flags = self.menuModel.flags
+        self.launchGuard.cooldown = flags.get("launch-cooldown", 1000) / 1000.0
+        self.launchGuard.rate = flags.get("launch-rate-limit", 5)
+        self.unlockCache.timeout = flags.get("unlock-timeout", 300)
 
     def changeEvent(self, changeEvent):
         """Catch when main window is selected and set focus to search."""
 
         if changeEvent.type() == QtCore.QEvent.ActivationChange and \
-                self.isActiveWindow() and self.use_sbox:
-            self.searchInput.setFocus()
+                self.isActiveWindow():
+            if self.use_sbox:
+                self.searchInput.setFocus()
+            # Programs may have been installed or removed meanwhile
+            self.checkExecutables()
 
     def mouseMoveEvent(self, event):
         """ Activate window whenever mouse is over to get keyboard focus and show tooltips """
@@ -202,6 +650,92 @@ class LauncherWindow(QMainWindow):
             self.activateWindow()
             self.raise_()  # Raise above other windows
 
+    def launchAll(self, title, buttons):
+        """Launch all given command buttons as one batch.
+
+        Passwords of protected items are asked once per password before the
+        batch is started. Batch is limited by flags "launch-all-concurrency",
+        "launch-all-stagger" and "launch-all-settle" of the root menu.
+        """
+
+        buttons = [button for button in buttons
+                   if isinstance(button, LauncherCmdButton) and
+                   self.executableReasons.get(button.cmd) is None]
+        if not buttons:
+            return
+
+        verified = set()
+        for button in buttons:
+            if button.pwd is not None and button.pwd not in verified:
+                if not verifyPassword(self, button.pwd):
+                    return
+                verified.add(button.pwd)
+
+        flags = self.menuModel.flags
+        queue = LauncherLaunchQueue(
+            title, buttons,
+            flags.get("launch-all-concurrency", 4),
+            flags.get("launch-all-stagger", 250),
+            flags.get("launch-all-settle", 2000), self)
+        queue.start()
+
+    def watchLaunch(self, itemModel, argv, latency, process=None):
+        """Record launch in usage and launch log and watch for exit of the
+        process.
+
+        Items which run inside the launcher have no process.
+        """
+
+        if self.usage is not None:
+            self.usage.record(itemModel.get_id())
+        if self.launchLog is None:
+            return
+        pid = process.pid if process is not None else None
+        recordId = self.launchLog.launched(itemModel.get_path(), argv,
+                                           latency, pid)
+        if process is not None:
+            self.processes.append((process, recordId, time.monotonic()))
+            self.processTimer.start()
+
+    def getCmdButtons(self):
+        """Return {item id: button} of all items of current view."""
+
+        buttons = dict()
+        for button in self.iterCmdButtons():
+            buttons.setdefault(button.itemModel.get_id(), button)
+        return buttons
+
+    def iterCmdButtons(self):
+        """Yield command buttons of all menus of current view."""
+
+        menus = [self.launcherMenu]
+        while menus:
+            menu = menus.pop(0)
+            for action in menu.actions():
+                if not isinstance(action, LauncherMenuWidgetAction):
+                    continue
+                widget = action.defaultWidget()
+                if isinstance(widget, LauncherCmdButton):
+                    yield widget
+                elif isinstance(widget, LauncherMenuButton):
+                    menus.append(widget.menu())
+
+    def getUsageScores(self):
+        if self.usage is None:
+            return dict()
+        return self.usage.get_scores()
+
+    def checkProcesses(self):
+        for entry in list(self.processes):
+            process, recordId, started = entry
+            returnCode = process.poll()
+            if returnCode is not None:
+                self.processes.remove(entry)
+                self.launchLog.exited(recordId, returnCode,
+                                      time.monotonic() - started)
+        if not self.processes:
+            self.processTimer.stop()
+
     def buildMenuModel(self, rootMenuPath):
         """Return model of a menu defined in rootMenuFile."""
         rootMenuFullPath = join_launcher_path(self.launcherCfg.get("launcher_base"),
@@ -218,6 +752,156 @@ class LauncherWindow(QMainWindow):
         return rootMenu
 
 
+class LauncherIdleWarmer(QtCore.QObject):
+
+    """Run warming tasks while the launcher is idle.
+
+    Tasks are generators, which do a small part of their work on each step.
+    Steps are run on the event loop for at most WARM_SLICE_TIME at once. Any
+    user input pauses warming until there was no input for WARM_IDLE_DELAY.
+    """
+
+    INPUT_EVENTS = frozenset([
+        QtCore.QEvent.KeyPress, QtCore.QEvent.MouseButtonPress,
+        QtCore.QEvent.MouseButtonDblClick, QtCore.QEvent.MouseMove,
+        QtCore.QEvent.Wheel, QtCore.QEvent.TouchBegin])
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.enabled = True
+        self.tasks = collections.deque()
+        self.idleTimer = QtCore.QTimer(self)
+        self.idleTimer.setSingleShot(True)
+        self.idleTimer.setInterval(WARM_IDLE_DELAY)
+        self.idleTimer.timeout.connect(self.resume)
+        self.stepTimer = QtCore.QTimer(self)
+        self.stepTimer.setInterval(0)
+        self.stepTimer.timeout.connect(self.step)
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() in self.INPUT_EVENTS and self.tasks:
+            self.stepTimer.stop()
+            self.idleTimer.start()
+        return False
+
+    def schedule(self, task, urgent=False):
+        """Add task, urgent tasks are run before all others."""
+
+        if not self.enabled:
+            return
+        if urgent:
+            self.tasks.appendleft(task)
+        else:
+            self.tasks.append(task)
+        if not self.stepTimer.isActive():
+            self.idleTimer.start()
+
+    def clear(self):
+        self.tasks.clear()
+        self.idleTimer.stop()
+        self.stepTimer.stop()
+
+    def resume(self):
+        if self.tasks:
+            self.stepTimer.start()
+
+    def step(self):
+        deadline = time.perf_counter() + WARM_SLICE_TIME
+        while self.tasks:
+            try:
+                next(self.tasks[0])
+            except (StopIteration, RuntimeError):
+                # Done, or its widgets were deleted meanwhile
+                self.tasks.popleft()
+            if time.perf_counter() > deadline:
+                return
+        self.stepTimer.stop()
+
+
+class LauncherLaunchQueue(QtCore.QObject):
+
+    """Launch a batch of commands with limited concurrency.
+
+    Commands are started one by one with a stagger delay (ms) between them.
+    A started command is counted as "starting" until it exits or until the
+    settle time (ms) passes. No new command is started while concurrency
+    commands are still starting. Commands that cannot be executed or that
+    exit with an error while starting are reported in one summary at the
+    end.
+    """
+
+    def __init__(self, title, buttons, concurrency, stagger, settle,
+                 parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.title = title
+        self.pending = list(buttons)
+        self.total = len(self.pending)
+        self.concurrency = max(1, concurrency)
+        self.settle = settle / 1000.0
+        self.starting = list()
+        self.failures = list()
+        self.launched = 0
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(max(stagger, 10))
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        self.step()
+        self.timer.start()
+
+    def step(self):
+        """Check starting commands and start next one if allowed."""
+
+        now = time.monotonic()
+        for entry in list(self.starting):
+            button, process, started = entry
+            returnCode = process.poll()
+            if returnCode is not None:
+                self.starting.remove(entry)
+                if returnCode != 0:
+                    self.launched -= 1
+                    self.failures.append(
+                        "{}: exited with code {}".format(button.itemModel.text,
+                                                         returnCode))
+            elif now - started >= self.settle:
+                self.starting.remove(entry)
+
+        if self.pending and len(self.starting) < self.concurrency:
+            button = self.pending.pop(0)
+            process = button.launch()
+            if process is None:
+                self.failures.append(
+                    "{}: cannot be executed".format(button.itemModel.text))
+            else:
+                self.launched += 1
+                if process is not True:  # Actions run in the launcher
+                    self.starting.append((button, process, now))
+
+            self.parent().statusBar().showMessage(
+                "Launching \"{}\": {}/{}".format(
+                    self.title, self.total - len(self.pending), self.total))
+
+        if not self.pending and not self.starting:
+            self.timer.stop()
+            self.showSummary()
+            self.deleteLater()
+
+    def showSummary(self):
+        summary = "Launched {} of {} items from \"{}\".".format(
+            self.launched, self.total, self.title)
+        self.parent().statusBar().showMessage(summary, 5000)
+        if self.failures:
+            messageBox = QMessageBox(self.parent())
+            messageBox.setIcon(QMessageBox.Warning)
+            messageBox.setWindowTitle("Launch all")
+            messageBox.setText(summary)
+            messageBox.setDetailedText("\n".join(self.failures))
+            messageBox.setStandardButtons(QMessageBox.Ok)
+            messageBox.show()
+
+
 class LauncherMenu(QMenu):
 
     """Super class of all menu visualizations.
@@ -227,12 +911,14 @@ class LauncherMenu(QMenu):
     manipulation.
     """
 
-    def __init__(self, menuModel, button=None, parent=None):
+    def __init__(self, menuModel, button=None, parent=None, build=True):
         QMenu.__init__(self, parent)
         self.setSeparatorsCollapsible(False)
         self.filterTerm = ""
         self.menuModel = menuModel
-        self.buildMenu(self.menuModel.menu_items)
+        self.warmed = False
+        if build:
+            self.buildMenu(self.menuModel.menu_items)
         self.initFilterVisibility = True
         self.filterConditions = [False, True, False]
         self.button = button
@@ -244,12 +930,31 @@ class LauncherMenu(QMenu):
         from it and add them to the menu.
         """
 
+        for _ in self.buildMenuSteps():
+            pass
+
+    def buildMenuSteps(self):
+        """Build menu and its submenus, yield after each item.
+
+        Allows building of large menus in slices between processing of
+        events.
+        """
+
         sectionTitle = None
         for item in self.menuModel.menu_items:
             if item.__class__.__name__ == "launcher_cmd_item":
                 self.appendToMenu(LauncherCmdButton(item, sectionTitle, self))
+            elif item.__class__.__name__ == "launcher_action_item":
+                self.appendToMenu(LauncherActionButton(item, sectionTitle,
+                                                       self))
             elif item.__class__.__name__ == "launcher_sub_menu_item":
-                self.appendToMenu(LauncherMenuButton(item, sectionTitle, self))
+                menuButton = LauncherMenuButton(item, sectionTitle, self,
+                                                build=False)
+                self.appendToMenu(menuButton)
+                yield
+                for step in menuButton.menu().buildMenuSteps():
+                    yield step
+                continue
             elif item.__class__.__name__ == "launcher_title_item":
                 sectionTitle = None
                 titleButton = LauncherMenuTitle(item, sectionTitle, self)
@@ -257,6 +962,25 @@ class LauncherMenu(QMenu):
                 sectionTitle = titleButton
             elif item.__class__.__name__ == "launcher_item_separator":
                 self.addAction(LauncherSeparator(item, self))
+            yield
+
+    def warmSteps(self):
+        """Prepare menu to be shown fast, yield after each item.
+
+        Style sheets are applied and native window is created, which would
+        otherwise be done when the menu is shown for the first time.
+        """
+
+        if self.warmed:
+            return
+        self.ensurePolished()
+        for action in self.actions():
+            if isinstance(action, LauncherMenuWidgetAction):
+                action.defaultWidget().ensurePolished()
+                yield
+        self.adjustSize()
+        self.winId()
+        self.warmed = True
 
     def appendToMenu(self, widget):
         """Append action to menu.
@@ -357,7 +1081,7 @@ class LauncherMenu(QMenu):
                 action.setVisibility(True)
                 hasVisible = True
 
-            elif widgetType == "LauncherCmdButton" and cmdFilter and\
+            elif isinstance(widget, LauncherCmdButton) and cmdFilter and\
                 stringContains(widget.cmd, filterTerm, sensitivityFilter):
 
                 action.setVisibility(True)
@@ -378,6 +1102,7 @@ class LauncherMenu(QMenu):
 
         # Do nothing if the event comes from outside the application
         if not showEvent.spontaneous():
+            self.applyExecutableReasons()
             if self.button:
                 width = self.button.width()
                 height = self.button.height()
@@ -402,6 +1127,20 @@ class LauncherMenu(QMenu):
             self.actions()[i].defaultWidget().setFocus()
             self.setActiveAction(self.actions()[i])
 
+    def applyExecutableReasons(self):
+        """Disable buttons whose program was not found.
+
+        Results of checks are applied when menu is shown, so hidden menus
+        are not restyled.
+        """
+
+        reasons = self.getLauncherWindow().executableReasons
+        for action in self.actions():
+            if isinstance(action, LauncherMenuWidgetAction):
+                widget = action.defaultWidget()
+                if isinstance(widget, LauncherCmdButton):
+                    widget.setUnavailable(reasons.get(widget.cmd))
+
     def getMainMenu(self):
         """Return menu of mainButton from which all menus expand.
 
@@ -424,8 +1163,8 @@ class LauncherSubMenu(LauncherMenu):
     Creates detach button and adds it to the menu.
     """
 
-    def __init__(self, menuModel, button, parent=None):
-        LauncherMenu.__init__(self, menuModel, button, parent)
+    def __init__(self, menuModel, button, parent=None, build=True):
+        LauncherMenu.__init__(self, menuModel, button, parent, build)
         self.detachButton = LauncherDetachButton(self)
         self.insertToMenu(self.detachButton, 0)
 
@@ -519,9 +1258,23 @@ class LauncherSearchMenuView(LauncherMenu):
     def buildMenu(self, menuModel):
         """Visualize menu
 
-        Override this method and build different visualization.
+        Override this method and build different visualization. Items of
+        submenus follow items of the menu. Within each section frequently
+        started items are placed first.
         """
-        cMenuItems = list(self.menuModel.menu_items)
+        menus = [self.menuModel.menu_items]
+        for menuItems in menus:
+            for item in menuItems:
+                if item.__class__.__name__ == "launcher_sub_menu_item":
+                    menus.append(item.sub_menu.menu_items)
+        # Items are boosted only within their own menu
+        scores = self.getLauncherWindow().getUsageScores()
+        cMenuItems = list()
+        for menuItems in menus:
+            if scores:
+                menuItems = boostItems(menuItems, scores)
+            cMenuItems.extend(menuItems)
+
         sectionTitle = None
         for item in cMenuItems:
             levelPrefix = ""
@@ -532,11 +1285,10 @@ class LauncherSearchMenuView(LauncherMenu):
                 button = LauncherCmdButton(item, sectionTitle, self)
                 self.appendToMenu(button)
                 addPrefix = True
-            elif item.__class__.__name__ == "launcher_sub_menu_item":
-                # Take subemnu model and build (visualize) it below
-
-                cSubMenuItems = copy.copy(item.sub_menu.menu_items)
-                cMenuItems.extend(cSubMenuItems)
+            elif item.__class__.__name__ == "launcher_action_item":
+                button = LauncherActionButton(item, sectionTitle, self)
+                self.appendToMenu(button)
+                addPrefix = True
             elif item.__class__.__name__ == "launcher_title_item":
                 button = LauncherMenuTitle(item, None, self)
                 self.appendToMenu(button)
@@ -618,7 +1370,9 @@ class LauncherFilterLineEdit(QLineEdit):
     def __init__(self, menu, parent=None):
         QLineEdit.__init__(self, parent)
         self.menu = menu
-        self.textChanged.connect(lambda: self.menu.filterMenu(self.text()))
+        self.textChanged.connect(self.filterMenu)
+        # Search requested before menu was set
+        self.searchPending = False
         self.myAction = None
         self.setPlaceholderText("Enter filter term.")
         self.setClearButtonEnabled(True)
@@ -633,6 +1387,21 @@ class LauncherFilterLineEdit(QLineEdit):
     def setMyAction(self, action):
         self.myAction = action
 
+    def setMenu(self, menu):
+        """Set menu to be filtered and apply input typed until now."""
+
+        self.menu = menu
+        if self.text():
+            self.filterMenu()
+        if self.searchPending:
+            self.searchPending = False
+            self.openSearch()
+
+    def filterMenu(self):
+        # Input is kept until menu is set
+        if self.menu is not None:
+            self.menu.filterMenu(self.text())
+
     def keyPressEvent(self, event):
         """Catch key pressed event.
 
@@ -654,6 +1423,9 @@ class LauncherFilterLineEdit(QLineEdit):
 
     def openSearch(self):
         """ Do a search on full menu (root menu)."""
+        if self.menu is None:
+            self.searchPending = True
+            return
         menu = self.menu.getMainMenu()
         searchMenu = LauncherSearchMenuView(menu.menuModel, menu.button,
                                             menu)
@@ -697,7 +1469,7 @@ class LauncherFilterWidget(QWidget):
         self.setFocusProxy(self.searchInput)
 
     def setMenu(self, menu):
-        self.searchInput.menu = menu
+        self.searchInput.setMenu(menu)
 
     def setMyAction(self, action):
         self.myAction = action
@@ -801,10 +1573,40 @@ class LauncherMenuTitle(QLabel):
         style = LauncherStyle(self, itemModel.theme, itemModel.style)
         self.setStyleSheet(style.style)
 
+        self.contextMenu = QMenu(self)
+        launchAllAction = QAction("Launch all in section", self)
+        launchAllAction.triggered.connect(self.launchAll)
+        self.contextMenu.addAction(launchAllAction)
+        self.itemModel = itemModel
+
     def setMyAction(self, action):
         self.myAction = action
         self.myAction.setSeparator(True)
 
+    def sectionButtons(self):
+        """Return command buttons which belong to this title."""
+
+        buttons = list()
+        for action in self.parent().actions():
+            if isinstance(action, LauncherMenuWidgetAction):
+                widget = action.defaultWidget()
+                if isinstance(widget, LauncherCmdButton) and \
+                        widget.sectionTitle is self:
+                    buttons.append(widget)
+        return buttons
+
+    def contextMenuEvent(self, event):
+        """ Show context menu if section has any commands"""
+
+        if self.sectionButtons():
+            self.contextMenu.exec_(QCursor.pos())
+
+    def launchAll(self):
+        buttons = self.sectionButtons()
+        self.parent().hideAll()
+        self.parent().getLauncherWindow().launchAll(self.itemModel.text,
+                                                    buttons)
+
 
 class LauncherButton(QPushButton):
 
@@ -908,8 +1710,13 @@ class LauncherMainButton(LauncherButton):
 
     def __init__(self, menu, parent=None):
         LauncherButton.__init__(self, None, parent)
-        self.restyle(menu.menuModel.main_title)
-        self.setMenu(menu)
+        if menu is None:
+            # Menu is set when loaded
+            self.setText("Loading...")
+            self.setEnabled(False)
+        else:
+            self.restyle(menu.menuModel.main_title)
+            self.setMenu(menu)
 
     def restyle(self, itemModel):
         self.setText(itemModel.text.replace('&', '&&'))  # For QButton &X means that X is shortcut, && gives &
@@ -1002,6 +1809,8 @@ class LauncherCmdButton(LauncherNamedButton):
         toolTip = toolTip + "[Command: " + self.cmd + "]"
 
         self.setToolTip(toolTip)
+        self.cmdToolTip = toolTip
+        self.unavailableReason = None
 
         copyAction = QAction("Copy command", self)
         copyAction.triggered.connect(self.copyCmd)
@@ -1011,6 +1820,19 @@ class LauncherCmdButton(LauncherNamedButton):
         else:
             self.contextMenu.addAction(copyAction)
 
+    def setUnavailable(self, reason):
+        """Disable button if command cannot be started and show reason in
+        tooltip. Button is enabled again if reason is None."""
+
+        if reason == self.unavailableReason:
+            return
+        self.unavailableReason = reason
+        self.setEnabled(reason is None)
+        if reason is None:
+            self.setToolTip(self.cmdToolTip)
+        else:
+            self.setToolTip(reason + " " + self.cmdToolTip)
+
     def copyCmd(self):
         cb = QApplication.clipboard()
         cb.clear(mode=cb.Clipboard)
@@ -1025,24 +1847,107 @@ class LauncherCmdButton(LauncherNamedButton):
         first line (strictly).
         """
 
+        clickTime = time.monotonic()
         self.parent().hideAll()  # When done hide all popuped menus
-        try:
-            if self.pwd is not None:
-                """passwordInput = showPasswordDialog(self)
-                if passwordInput is not None:
-                    convertedPwd = convertPwdToHash(passwordInput)
-                    if convertedPwd != self.pwd:
-                        showWrongPasswordDialog()
-                        return"""
-                if verifyPassword(self, self.pwd):
-                    subprocess.Popen(shlex.split(self.cmd))
-            else:
-                subprocess.Popen(shlex.split(self.cmd))
 
+        # Suppressed launches are refused before password is asked for
+        window = self.parent().getLauncherWindow()
+        reason = window.launchGuard.allow(self.itemModel)
+        if reason and window.launchLog is not None:
+            window.launchLog.suppressed(self.itemModel.get_path(), reason)
+
+        if reason == "cooldown":
+            window.statusBar().showMessage(
+                "\"" + self.itemModel.text + "\" was just started.", 2000)
+        elif reason == "rate":
+            window.statusBar().showMessage(
+                "Too many launches. \"" + self.itemModel.text +
+                "\" was not started.", 2000)
+        elif self.pwd is not None:
+            if verifyPassword(self, self.pwd):
+                self.launch(time.monotonic())  # Do not measure user typing
+        else:
+            self.launch(clickTime)
+
+    def launch(self, clickTime=None):
+        """Start command without any user interaction.
+
+        Returns the started process or None if the command cannot be
+        executed. Time from clickTime to start is recorded in launch log.
+        """
+
+        if clickTime is None:
+            clickTime = time.monotonic()
+        try:
+            window = self.parent().getLauncherWindow()
+            process = spawn_cmd(self.cmd, self.itemModel.resources,
+                                window.launchEnvironment, window.launchCwd)
         except OSError:
             warn_msg = "Command \"" + self.cmd + "\" cannot be executed. " + \
                 "Wrong path or bad/no interpreter."
             logging.warning(warn_msg)
+            return None
+
+        self.parent().getLauncherWindow().watchLaunch(
+            self.itemModel, process.args, time.monotonic() - clickTime,
+            process)
+        return process
+
+
+class LauncherActionButton(LauncherCmdButton):
+
+    """ LauncherActionButton runs an action inside the launcher.
+
+    Built-in actions are "url", which opens an URL, and "open-file", which
+    opens a file or directory with the default application. Any other
+    action is a callable registered as entry point in the
+    "pylauncher.actions" group, which is called with the target and the
+    item model.
+    """
+
+    def __init__(self, itemModel, sectionTitle=None, parent=None):
+        LauncherCmdButton.__init__(self, itemModel, sectionTitle, parent)
+        toolTip = ""
+        if itemModel.tip:
+            toolTip = itemModel.tip + " "
+        toolTip = toolTip + "[" + itemModel.action + ": " + self.cmd + "]"
+
+        self.setToolTip(toolTip)
+        self.cmdToolTip = toolTip
+
+    def launch(self, clickTime=None):
+        """Run action. Returns True if action succeeded, otherwise None."""
+
+        if clickTime is None:
+            clickTime = time.monotonic()
+        action = self.itemModel.action
+        try:
+            if action == "url":
+                succeeded = QDesktopServices.openUrl(
+                    QtCore.QUrl(self.cmd, QtCore.QUrl.TolerantMode))
+            elif action == "open-file":
+                succeeded = QDesktopServices.openUrl(
+                    QtCore.QUrl.fromUserInput(self.cmd))
+            else:
+                actionCallable = load_action(action)
+                if actionCallable is None:
+                    logging.warning("Action \"" + action + "\" is not " +
+                                    "registered.")
+                    return None
+                succeeded = actionCallable(self.cmd, self.itemModel) \
+                    is not False
+        except Exception as e:
+            logging.warning("Action \"" + action + "\" failed: " + str(e))
+            return None
+
+        if not succeeded:
+            logging.warning("Action \"" + action + "\" cannot open \"" +
+                            self.cmd + "\".")
+            return None
+
+        self.parent().getLauncherWindow().watchLaunch(
+            self.itemModel, [action, self.cmd], time.monotonic() - clickTime)
+        return True
 
 
 class LauncherMenuButton(LauncherNamedButton):
@@ -1053,9 +1958,9 @@ class LauncherMenuButton(LauncherNamedButton):
     popped up.
     """
 
-    def __init__(self, itemModel, sectionTitle=None, parent=None):
+    def __init__(self, itemModel, sectionTitle=None, parent=None, build=True):
         LauncherNamedButton.__init__(self, itemModel, sectionTitle, parent)
-        menu = LauncherSubMenu(itemModel.sub_menu, self, self.parent())
+        menu = LauncherSubMenu(itemModel.sub_menu, self, self.parent(), build)
         self.setMenu(menu)
 
         toolTip = ""
@@ -1065,6 +1970,33 @@ class LauncherMenuButton(LauncherNamedButton):
 
         self.setToolTip(toolTip)
 
+        launchAllAction = QAction("Launch all", self)
+        launchAllAction.triggered.connect(self.launchAll)
+        # If actions (Help) already exist put above them
+        if self.contextMenu.actions():
+            self.contextMenu.insertAction(self.contextMenu.actions()[0],
+                                          launchAllAction)
+        else:
+            self.contextMenu.addAction(launchAllAction)
+
+    def launchAll(self):
+        """Launch all commands of the submenu as one batch."""
+
+        buttons = list()
+        for action in self.menu().actions():
+            if isinstance(action, LauncherMenuWidgetAction):
+                buttons.append(action.defaultWidget())
+        self.parent().hideAll()
+        self.parent().getLauncherWindow().launchAll(self.itemModel.text,
+                                                    buttons)
+
+    def enterEvent(self, event):
+        """Prepare submenu while pointer is over its button."""
+
+        self.parent().getLauncherWindow().warmer.schedule(
+            self.menu().warmSteps(), True)
+        LauncherNamedButton.enterEvent(self, event)
+
     def keyPressEvent(self, event):
         """Submenu can also be opened with right arrow key."""
 
@@ -1128,6 +2060,15 @@ class LauncherViewMenu(QMenu):
         searchAction.triggered.connect(self.openSearch)
         self.addAction(searchAction)
 
+        lockAction = QAction("Lock", self)
+        lockAction.setShortcuts(QKeySequence("Ctrl+L"))
+        lockAction.setStatusTip("Ask for passwords again")
+        lockAction.triggered.connect(self.lockPasswords)
+        self.addAction(lockAction)
+
+    def lockPasswords(self):
+        getUnlockCache(self).lock()
+
     def initHistoryMenu(self):
         self.historyMenu.clear()
         self.historyMenu.addSeparator()
@@ -1174,6 +2115,43 @@ class LauncherFileChoiceAction(QAction):
         candidate.setNewView(self.itemModel.root_menu_file, self.itemModel.text)
 
 
+class LauncherFrequentMenu(QMenu):
+
+    """Menu bar menu with most frequently started items of current view.
+
+    Number of items is set with "frequent-items" flag. Menu is filled each
+    time it is opened, so it always reflects launches of all instances.
+    """
+
+    def __init__(self, text, parent=None):
+        QMenu.__init__(self, text, parent)
+        self.aboutToShow.connect(self.buildFrequentMenu)
+
+    def buildFrequentMenu(self):
+        self.clear()
+        launcherWindow = self.parent().parent()
+        scores = launcherWindow.getUsageScores()
+        buttons = launcherWindow.getCmdButtons()
+        frequent = sorted((itemId for itemId in buttons if scores.get(itemId)),
+                          key=lambda itemId: -scores[itemId])
+        frequent = frequent[:launcherWindow.menuModel.flags.get(
+            "frequent-items", 10)]
+
+        if not frequent:
+            emptyAction = self.addAction("No items started yet")
+            emptyAction.setEnabled(False)
+        for itemId in frequent:
+            button = buttons[itemId]
+            # For QAction &X means that X is shortcut, && gives &
+            action = self.addAction(
+                button.itemModel.get_path().replace('&', '&&'))
+            action.setToolTip(button.toolTip())
+            action.setEnabled(
+                launcherWindow.executableReasons.get(button.cmd) is None)
+            action.triggered.connect(
+                lambda checked, button=button: button.executeCmd(None))
+
+
 class LauncherStyle(object):
 
     """ Class which handles qss style sheet from multiple sources """
@@ -1216,60 +2194,33 @@ class LauncherStyle(object):
         self.style = self.styleString
 
 
-def main():
-    """ Main logic """
-
-    argsPars = argparse.ArgumentParser()
-    argsPars.add_argument('configuration',
-                          help="menu/configuration file")
-    argsPars.add_argument('-m', '--mapping',
-                          help='overwrite default mapping file')
-    argsPars.add_argument('-s', '--style',
-                          help="overwrite default style (qss file)")
-    argsPars.add_argument('--position', type=int, nargs=2, metavar=('X', 'Y'),
-                          help="set initial position on the screen")
-    args = argsPars.parse_args()
-
-
-    app = QApplication(sys.argv)
-
-    # Load configuration. Use default configuration defined inside package if
-    # --config is not specified
+def setApplicationStyle(app):
     currDir = os.path.dirname(os.path.realpath(__file__))
-    cfgPath = os.path.join(currDir, "resources/mapping/mapping.json")
-    cfgFile = open_launcher_file(cfgPath)
-    cfgString = cfgFile.read(-1).decode('utf-8')
-    defaultCfg = json.loads(cfgString)
-    defaultCfg["cfg_base"] = os.path.dirname(cfgPath)
-    cfgFile.close()
-
-    default = True
-    logMsg = ""
-    if args.mapping:
-        try:
-            cfgFile = open_launcher_file(args.mapping)
-            cfgString = cfgFile.read(-1).decode('utf-8')
-            cfg = json.loads(cfgString)
-            cfg["cfg_base"] = os.path.dirname(args.mapping)
-            cfgFile.close()
-            default = False
-        except:
-            logMsg = "Problems opening \"" + args.mapping + "\". "
-
-    if default:
-        cfg = defaultCfg
-        logMsg += "Launcher will be loaded with default mapping."
-        logging.warning(logMsg)
-
-
-    # Create Launcher Window and load default style and theme
-    launcherWindow = LauncherWindow(args.configuration, cfg)
-
     app.setStyle("cleanlooks")
     styleFile = open_launcher_file(os.path.join(currDir,
                                                 "resources/qss/default.qss"))
     app.setStyleSheet(styleFile.read().decode('utf-8'))
     styleFile.close()
+
+
+def createLauncherWindow(args):
+    """Return launcher window for configuration, mapping and style of args.
+
+    Window is returned before its menu is loaded, so it can be shown at
+    once.
+    """
+
+    configuration, cfg = load_configuration(args)
+
+    # Create Launcher Window and load user style
+    launchLog = None
+    usage = None
+    if not args.no_launch_log:
+        launchLog = launch_log(args.launch_log)
+        usage = usage_store()
+    launcherWindow = LauncherWindow(configuration, cfg, launchLog=launchLog,
+                                    progressive=True, usage=usage)
+
     if args.style:
         try:
             userStyle = open_launcher_file(args.style)
@@ -1279,16 +2230,17 @@ def main():
             logging.warning("Problems opening \"" + args.style + "\". Launcher will be opened with default style.")
 
     launcherWindow.setMinimumWidth(250)
-    launcherWindow.show()
-    geometry = launcherWindow.geometry()
+    return launcherWindow
 
-    # Set to desired position
-    position = args.position
 
-    if not position:  # Set defaults
-        position = [0, 0]
+def moveLauncherWindow(launcherWindow, position):
+    """Move shown window to position [x, y].
+
+    Negative values are relative to the opposite corner of the screen.
+    """
 
-    screenGeometry = app.desktop().geometry()
+    geometry = launcherWindow.geometry()
+    screenGeometry = QApplication.desktop().geometry()
     # Negative values should be treated as starting from oposite corner
     if position[0] < 0:  # X
         position[0] = screenGeometry.width()-geometry.width()+position[0]
@@ -1299,9 +2251,207 @@ def main():
     # Update x/y coordinates of window
     launcherWindow.move(position[0], position[1])
 
+
+class LauncherDaemon(QtCore.QObject):
+
+    """Resident launcher which opens windows for clients (--daemon).
+
+    Windows are kept when closed and shown again on the next request with
+    the same configuration, mapping and style. A window is rebuilt if one of
+    its menu files was changed since it was built.
+    """
+
+    def __init__(self, socketPath, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.socketPath = socketPath
+        self.lockFile = None
+        # {request key: (window, menu files, signature of menu files)}
+        self.windows = dict()
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.acceptConnection)
+
+    def listen(self):
+        """Start listening. Return False if other daemon is running."""
+
+        # Socket left behind by a crashed daemon must be removed, but not
+        # the one of a running daemon. Lock is held while daemon runs.
+        if fcntl is not None:
+            self.lockFile = open(self.socketPath + ".lock", "w")
+            try:
+                fcntl.flock(self.lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                logging.error("Other launcher daemon is running on \"" +
+                              self.socketPath + "\".")
+                return False
+
+        QLocalServer.removeServer(self.socketPath)
+        if not self.server.listen(self.socketPath):
+            logging.error("Cannot listen on \"" + self.socketPath + "\": " +
+                          self.server.errorString())
+            return False
+        return True
+
+    def acceptConnection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(
+                lambda connection=connection: self.readRequest(connection))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def readRequest(self, connection):
+        if not connection.canReadLine():
+            return
+
+        try:
+            request = json.loads(bytes(connection.readLine()).decode('utf-8'))
+            args = argparse.Namespace(
+                configuration=request["configuration"],
+                mapping=request.get("mapping"),
+                style=request.get("style"),
+                position=request.get("position"),
+                launch_log=request.get("launch_log"),
+                no_launch_log=request.get("launch_log") is None,
+                environment=request.get("environment"),
+                cwd=request.get("cwd"))
+            if args.environment is not None and not all(
+                    isinstance(name, str) and isinstance(value, str)
+                    for name, value in args.environment.items()):
+                raise ValueError("environment must map names to strings")
+            if args.cwd is not None and not isinstance(args.cwd, str):
+                raise ValueError("cwd must be a string")
+        except Exception as e:
+            self.reply(connection, {"ok": False,
+                                    "error": "Invalid request: " + str(e)})
+            return
+
+        # Client is answered before the window is built, so it does not wait
+        # for it.
+        self.reply(connection, {"ok": True})
+        QtCore.QTimer.singleShot(0, lambda: self.showWindow(args))
+
+    def reply(self, connection, answer):
+        connection.write((json.dumps(answer) + "\n").encode('utf-8'))
+        connection.flush()
+        connection.disconnectFromServer()
+
+    def showWindow(self, args):
+        """Show window for request.
+
+        If the window cannot be opened, only this window is dropped and the
+        daemon keeps serving other windows.
+        """
+
+        key = (args.configuration, args.mapping, args.style, args.launch_log)
+        try:
+            self.openWindow(key, args)
+        except SystemExit:
+            # Reason was already reported
+            self.dropRequest(key)
+        except Exception:
+            logging.exception("Launcher for \"" + args.configuration +
+                              "\" failed.")
+            self.dropRequest(key)
+
+    def openWindow(self, key, args):
+        launcherWindow, menuFiles, signature = self.windows.pop(
+            key, (None, None, None))
+
+        # Files are known once menu is loaded
+        if launcherWindow is not None and menuFiles is not None and \
+                get_files_signature(menuFiles) != signature:
+            launcherWindow.close()
+            launcherWindow.deleteLater()
+            launcherWindow = None
+
+        position = args.position
+        if launcherWindow is None:
+            launcherWindow = createLauncherWindow(args)
+            launcherWindow.menuLoaded.connect(
+                lambda window=launcherWindow: self.recordMenuFiles(key,
+                                                                   window))
+            launcherWindow.loadFailed.connect(
+                lambda window=launcherWindow: self.dropWindow(key, window))
+            if not position:
+                position = [0, 0]
+        self.windows[key] = (launcherWindow, menuFiles, signature)
+        # Commands are started as if started by the client
+        launcherWindow.setLaunchContext(args.environment, args.cwd)
+
+        if not launcherWindow.isVisible() and \
+                launcherWindow.menuModel is not None and \
+                launcherWindow.menuModel.password is not None and \
+                not verifyPassword(launcherWindow,
+                                   launcherWindow.menuModel.password):
+            return
+
+        launcherWindow.show()
+        launcherWindow.raise_()
+        launcherWindow.activateWindow()
+        if position:
+            moveLauncherWindow(launcherWindow, position)
+
+    def recordMenuFiles(self, key, launcherWindow):
+        """Remember menu files of loaded window to detect their changes."""
+
+        self.windows[key] = (launcherWindow, launcherWindow.viewFiles,
+                             launcherWindow.viewSignature)
+
+    def dropRequest(self, key):
+        """Drop window of request which could not be opened."""
+
+        launcherWindow = self.windows.get(key, (None,))[0]
+        if launcherWindow is None:
+            logging.error("Launcher for \"" + key[0] + "\" was not opened.")
+        else:
+            self.dropWindow(key, launcherWindow)
+
+    def dropWindow(self, key, launcherWindow):
+        """Close window whose menu was not loaded."""
+
+        if self.windows.get(key, (None,))[0] is launcherWindow:
+            self.windows.pop(key)
+        logging.error("Launcher for \"" + key[0] + "\" was not opened.")
+        launcherWindow.close()
+        launcherWindow.deleteLater()
+
+
+def daemonMain():
+    """Run resident launcher, which opens windows for clients."""
+
+    app = QApplication(sys.argv)
+    # Windows are only hidden when closed and reused by next client
+    app.setQuitOnLastWindowClosed(False)
+    setApplicationStyle(app)
+
+    daemon = LauncherDaemon(get_socket_path())
+    if not daemon.listen():
+        sys.exit(-1)
     sys.exit(app.exec_())
 
 
+def main(args=None):
+    """ Main logic """
+
+    if args is None:
+        args = get_args_parser().parse_args()
+
+    app = QApplication(sys.argv)
+
+    launcherWindow = createLauncherWindow(args)
+    launcherWindow.loadFailed.connect(lambda: app.exit(-1))
+    setApplicationStyle(app)
+    launcherWindow.show()
+
+    # Set to desired position
+    position = args.position
+
+    if not position:  # Set defaults
+        position = [0, 0]
+    moveLauncherWindow(launcherWindow, position)
+
+    sys.exit(app.exec_())
+
 # Start program here
 if __name__ == '__main__':
     main()
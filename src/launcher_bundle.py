@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import io
+import os
+import json
+import mmap
+import struct
+import tempfile
+
+# Bundle file layout:
+#     magic (8 bytes)
+#     length of index (8 bytes, little endian)
+#     index (JSON)
+#     data of entries
+# Index: {"root": <entry of root menu>, "mapping": <mapping> or null,
+#         "entries": {<entry>: [<offset>, <length>]}}
+# Entries are paths relative to the common directory of all bundled menus,
+# themes are stored as _themes/<theme>.qss.
+BUNDLE_MAGIC = b"PYLBNDL1"
+THEMES_DIR = "_themes"
+
+_mounted = dict()
+
+
+def is_bundle(file_path):
+    try:
+        with open(file_path, "rb") as candidate:
+            return candidate.read(len(BUNDLE_MAGIC)) == BUNDLE_MAGIC
+    except (OSError, ValueError):
+        return False
+
+
+def write_bundle(bundle_path, root, entries, mapping=None):
+    """Write bundle of entries {entry: bytes} to bundle_path.
+
+    Bundle is written to a temporary file which replaces bundle_path, so
+    running launchers keep their mapped bundle.
+    """
+
+    index = {"root": root, "mapping": mapping, "entries": dict()}
+    # Offsets depend on length of index, which depends on offsets. Offsets
+    # are therefore stored relative to the end of the index and converted
+    # when loaded.
+    offset = 0
+    for entry, data in entries.items():
+        index["entries"][entry] = [offset, len(data)]
+        offset += len(data)
+    index_data = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    bundle_dir = os.path.dirname(os.path.abspath(bundle_path))
+    with tempfile.NamedTemporaryFile("wb", dir=bundle_dir, suffix=".tmp",
+                                     delete=False) as output:
+        try:
+            output.write(BUNDLE_MAGIC)
+            output.write(struct.pack("<Q", len(index_data)))
+            output.write(index_data)
+            for data in entries.values():
+                output.write(data)
+        except BaseException:
+            os.remove(output.name)
+            raise
+    os.chmod(output.name, 0o644)
+    os.replace(output.name, bundle_path)
+
+
+class bundle_file(io.BytesIO):
+
+    """Entry of a bundle opened as file, compatible with urlopen result."""
+
+    def __init__(self, data, url):
+        io.BytesIO.__init__(self, data)
+        self.url = url
+
+    def geturl(self):
+        return self.url
+
+
+class launcher_bundle(object):
+
+    """Memory mapped bundle of menus, mapping and themes.
+
+    Entries are available under virtual paths <bundle_path>/<entry>, so
+    menus reference each other with the same relative paths as on disk.
+    Only the index is parsed when bundle is opened, entries are read when
+    they are opened.
+    """
+
+    def __init__(self, bundle_path):
+        self.path = os.path.abspath(bundle_path)
+        with open(self.path, "rb") as mapped_file:
+            self.data = mmap.mmap(mapped_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+        header_length = len(BUNDLE_MAGIC) + 8
+        if self.data[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise IOError("File \"" + bundle_path + "\" is not a bundle.")
+        index_length, = struct.unpack(
+            "<Q", self.data[len(BUNDLE_MAGIC):header_length])
+        index = json.loads(
+            self.data[header_length:header_length + index_length].decode(
+                "utf-8"))
+
+        data_offset = header_length + index_length
+        self.entries = dict()
+        for entry, (offset, length) in index["entries"].items():
+            self.entries[entry] = (data_offset + offset, length)
+        self.root_path = self.get_path(index["root"])
+        self.mapping = index["mapping"]
+
+    def get_path(self, entry):
+        return os.path.join(self.path, *entry.split("/"))
+
+    def get_entry(self, file_path):
+        """Return entry for virtual path or None if not in bundle."""
+
+        file_path = os.path.normpath(os.path.abspath(file_path))
+        if not file_path.startswith(self.path + os.sep):
+            return None
+        entry = os.path.relpath(file_path, self.path).replace(os.sep, "/")
+        if entry not in self.entries:
+            return None
+        return entry
+
+    def open(self, entry):
+        offset, length = self.entries[entry]
+        return bundle_file(self.data[offset:offset + length],
+                           self.get_path(entry))
+
+
+def mount_bundle(bundle_path):
+    """Open bundle and make its entries available to open_bundle_file."""
+
+    bundle = launcher_bundle(bundle_path)
+    _mounted[bundle.path] = bundle
+    return bundle
+
+
+def open_bundle_file(file_path):
+    """Return opened file if file_path is in a mounted bundle, else None."""
+
+    # Virtual paths are never urls
+    if "://" in file_path:
+        return None
+    for bundle in _mounted.values():
+        entry = bundle.get_entry(file_path)
+        if entry is not None:
+            return bundle.open(entry)
+    return None
+
+
+def is_bundle_path(file_path):
+    return any(bundle.get_entry(file_path) is not None
+               for bundle in _mounted.values())
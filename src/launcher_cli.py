@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+# Command line front end of the launcher. Only modules needed to parse
+# arguments are imported here, so the daemon client starts fast. Headless
+# options (--list, --find, --run) never import PyQt5 and the GUI is imported
+# only when it is started.
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+from .launcher_telemetry import DEFAULT_LOG_PATH
+
+
+def get_args_parser():
+    args_pars = argparse.ArgumentParser()
+    args_pars.add_argument('configuration',
+                           help="menu/configuration file")
+    args_pars.add_argument('-m', '--mapping',
+                           help='overwrite default mapping file')
+    args_pars.add_argument('-s', '--style',
+                           help="overwrite default style (qss file)")
+    args_pars.add_argument('--position', type=int, nargs=2, metavar=('X', 'Y'),
+                           help="set initial position on the screen")
+    args_pars.add_argument('--launch-log', default=DEFAULT_LOG_PATH,
+                           help="file where launches are recorded (default: " + DEFAULT_LOG_PATH + ")")
+    args_pars.add_argument('--no-launch-log', action='store_true',
+                           help="do not record launches")
+    args_pars.add_argument('--daemon', action='store_true',
+                           help="open window in resident launcher (started if not running)")
+
+    headless = args_pars.add_argument_group(
+        'headless mode', 'query or start items without opening the launcher')
+    headless = headless.add_mutually_exclusive_group()
+    headless.add_argument('--list', action='store_true',
+                          help="print path and command of all items")
+    headless.add_argument('--find', metavar='TERM',
+                          help="print items whose text or command contains TERM")
+    headless.add_argument('--run', metavar='PATH',
+                          help="start item with path \"Menu > Submenu > Item\"")
+    args_pars.add_argument('--wait', action='store_true',
+                           help="with --run wait for the command and exit with its exit code")
+    return args_pars
+
+
+def load_configuration(args):
+    """Return path of root menu and mapping to be used.
+
+    Default mapping of the package is used if --mapping is not specified or
+    cannot be loaded. A bundle is mounted and its root menu and mapping are
+    used.
+    """
+
+    from .launcher_model import open_launcher_file
+    from .launcher_bundle import is_bundle, mount_bundle
+
+    # Load configuration. Use default configuration defined inside package if
+    # --config is not specified
+    curr_dir = os.path.dirname(os.path.realpath(__file__))
+    cfg_path = os.path.join(curr_dir, "resources/mapping/mapping.json")
+    cfg_file = open_launcher_file(cfg_path)
+    default_cfg = json.loads(cfg_file.read(-1).decode('utf-8'))
+    default_cfg["cfg_base"] = os.path.dirname(cfg_path)
+    cfg_file.close()
+
+    # Bundle contains root menu, all its menus and mapping
+    configuration = args.configuration
+    bundle = None
+    if is_bundle(configuration):
+        bundle = mount_bundle(configuration)
+        configuration = bundle.root_path
+
+    default = True
+    log_msg = ""
+    if args.mapping:
+        try:
+            cfg_file = open_launcher_file(args.mapping)
+            cfg = json.loads(cfg_file.read(-1).decode('utf-8'))
+            cfg["cfg_base"] = os.path.dirname(args.mapping)
+            cfg_file.close()
+            default = False
+        except:
+            log_msg = "Problems opening \"" + args.mapping + "\". "
+
+    if default and bundle is not None and bundle.mapping:
+        cfg = bundle.mapping
+        cfg["cfg_base"] = bundle.path
+    elif default:
+        cfg = default_cfg
+        log_msg += "Launcher will be loaded with default mapping."
+        logging.warning(log_msg)
+
+    return configuration, cfg
+
+
+def main():
+    """ Main logic """
+
+    # Daemon is started by clients and opens windows for them, so it needs
+    # no configuration of its own.
+    if sys.argv[1:] == ["--daemon-server"]:
+        from .launcher import daemonMain
+        daemonMain()
+        return
+
+    args = get_args_parser().parse_args()
+    if args.list or args.find is not None or args.run is not None:
+        from .launcher_headless import run_headless
+        run_headless(args)
+    elif args.daemon:
+        from .launcher_daemon import run_client
+        run_client(args)
+    else:
+        from .launcher import main as launcher_main
+        launcher_main(args)
+
+
+# Start program here
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+# Client side of the resident launcher (--daemon). It only talks to the
+# daemon over a UNIX socket and never imports PyQt5 or the menu model, so it
+# returns in the time Python needs to start.
+#
+# Protocol: client sends one JSON object terminated by a new line
+#     {"configuration": <path>, "mapping": <path> or null,
+#      "style": <path> or null, "position": [x, y] or null,
+#      "launch_log": <path> or null, "environment": {<name>: <value>},
+#      "cwd": <path>}
+# and daemon answers with one line {"ok": true} or
+# {"ok": false, "error": <message>}. Commands of the window are started with
+# environment and working directory of the client which showed it last.
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import tempfile
+import subprocess
+
+DAEMON_LOG_PATH = os.path.join(os.path.expanduser("~"), ".pylauncher",
+                               "daemon.log")
+START_TIMEOUT = 15.0
+
+
+def get_socket_path():
+    """Return socket of the daemon of this user and display."""
+
+    display = os.environ.get("DISPLAY") or \
+        os.environ.get("WAYLAND_DISPLAY") or "none"
+    display = "".join(c if c.isalnum() else "_" for c in display)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, "pylauncher-" + str(os.getuid()) + "-" +
+                        display + ".sock")
+
+
+def send_request(request, timeout=5.0):
+    """Send request to running daemon and return its answer.
+
+    Raises OSError if no daemon is listening.
+    """
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(timeout)
+        client.connect(get_socket_path())
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        answer = b""
+        while not answer.endswith(b"\n"):
+            data = client.recv(4096)
+            if not data:
+                break
+            answer += data
+    finally:
+        client.close()
+    try:
+        return json.loads(answer.decode("utf-8"))
+    except ValueError:
+        return {"ok": False, "error": "Invalid answer from daemon."}
+
+
+def start_daemon():
+    """Start daemon detached from this process and terminal."""
+
+    os.makedirs(os.path.dirname(DAEMON_LOG_PATH), exist_ok=True)
+    with open(DAEMON_LOG_PATH, "ab") as log:
+        subprocess.Popen([sys.executable, "-m", __package__ + ".launcher_cli",
+                          "--daemon-server"],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                         start_new_session=True, close_fds=True)
+
+
+def request_window(request):
+    """Ask daemon to show launcher window, start daemon if not running."""
+
+    try:
+        return send_request(request)
+    except OSError:
+        pass
+
+    start_daemon()
+    deadline = time.monotonic() + START_TIMEOUT
+    while True:
+        time.sleep(0.05)
+        try:
+            return send_request(request)
+        except OSError:
+            if time.monotonic() > deadline:
+                return {"ok": False,
+                        "error": "Daemon did not start, see \"" +
+                                 DAEMON_LOG_PATH + "\"."}
+
+
+def run_client(args):
+    """Open window for args in the daemon and exit."""
+
+    def abs_path(path):
+        if path and "://" not in path:
+            return os.path.abspath(path)
+        return path
+
+    configuration = abs_path(args.configuration)
+    if "://" not in configuration and not os.path.exists(configuration):
+        logging.error("File \"" + configuration + "\" not found.")
+        sys.exit(-1)
+
+    request = {"configuration": configuration,
+               "mapping": abs_path(args.mapping),
+               "style": abs_path(args.style),
+               "position": args.position,
+               "launch_log": None if args.no_launch_log
+               else abs_path(args.launch_log),
+               "environment": dict(os.environ),
+               "cwd": os.getcwd()}
+    answer = request_window(request)
+    if not answer.get("ok"):
+        logging.error(answer.get("error", "Unknown error."))
+        sys.exit(1)
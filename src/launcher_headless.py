@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+# Headless options of the launcher (--list, --find, --run). Only the menu
+# model is built, PyQt5 is never imported.
+
+import os
+import sys
+import time
+import getpass
+import logging
+import platform
+import webbrowser
+
+from .launcher_model import launcher_menu_model, launcher_cmd_item, \
+    launcher_action_item, join_launcher_path
+from .launcher_spawn import spawn_cmd, load_action
+from .launcher_telemetry import launch_log
+from .launcher_usage import usage_store
+from .launcher_password import check_password
+from .launcher_cli import load_configuration
+
+
+def get_system_cfg(cfg):
+    """Return part of mapping for current system."""
+
+    system_type = platform.system()
+    if system_type == "Darwin":
+        system_type = "OS_X"
+    return cfg.get(system_type)
+
+
+def build_menu_model(configuration, cfg):
+    """Build model of whole menu tree as the launcher window does."""
+
+    launcher_cfg = dict(get_system_cfg(cfg))
+    launcher_cfg["launcher_base"] = os.path.dirname(configuration)
+    root_path = join_launcher_path(launcher_cfg["launcher_base"],
+                                   os.path.basename(configuration))
+    try:
+        return launcher_menu_model(None, root_path, 0, launcher_cfg)
+    except IOError:
+        logging.error("File \"" + configuration + "\" not found.")
+        sys.exit(-1)
+
+
+def iter_items(menu_model):
+    """Yield all items which can be started, in menu order."""
+
+    for item in menu_model.menu_items:
+        if isinstance(item, launcher_cmd_item):
+            yield item
+        elif hasattr(item, "sub_menu"):
+            yield from iter_items(item.sub_menu)
+
+
+def ask_password(stored, prompt):
+    """Ask for password in terminal. Return True if it is correct."""
+
+    try:
+        password = getpass.getpass(prompt)
+    except (EOFError, KeyboardInterrupt):
+        return False
+    if check_password(password, stored):
+        return True
+    logging.error("Wrong password.")
+    return False
+
+
+def print_items(items):
+    for item in items:
+        print(item.get_path() + "\t" + item.cmd)
+
+
+def find_items(menu_model, term, scores=None):
+    """Return matching items, frequently started first."""
+
+    term = term.lower()
+    items = [item for item in iter_items(menu_model)
+             if term in (item.text or "").lower() or term in item.cmd.lower()]
+    if scores:
+        items.sort(key=lambda item: -scores.get(item.get_id(), 0))
+    return items
+
+
+def run_item(item, launch_log=None, wait=False, usage=None):
+    """Start item. Return exit code for the launcher process."""
+
+    if item.pwd is not None and \
+            not ask_password(item.pwd, "Password for \"" + item.text + "\": "):
+        return 1
+
+    start = time.monotonic()
+    if isinstance(item, launcher_action_item):
+        try:
+            if item.action in ("url", "open-file"):
+                target = item.cmd
+                if item.action == "open-file" and "://" not in target:
+                    target = "file://" + os.path.abspath(target)
+                succeeded = webbrowser.open(target)
+            else:
+                action_callable = load_action(item.action)
+                if action_callable is None:
+                    logging.error("Action \"" + item.action + "\" is not " +
+                                  "registered.")
+                    return 1
+                succeeded = action_callable(item.cmd, item) is not False
+        except Exception as e:
+            logging.error("Action \"" + item.action + "\" failed: " + str(e))
+            return 1
+        if not succeeded:
+            logging.error("Action \"" + item.action + "\" cannot open \"" +
+                          item.cmd + "\".")
+            return 1
+        if usage is not None:
+            usage.record(item.get_id())
+        if launch_log is not None:
+            launch_log.launched(item.get_path(), [item.action, item.cmd],
+                                time.monotonic() - start, None)
+        return 0
+
+    try:
+        process = spawn_cmd(item.cmd, item.resources)
+    except OSError:
+        logging.error("Command \"" + item.cmd + "\" cannot be executed. " +
+                      "Wrong path or bad/no interpreter.")
+        return 1
+
+    if usage is not None:
+        usage.record(item.get_id())
+    record_id = None
+    if launch_log is not None:
+        record_id = launch_log.launched(item.get_path(), process.args,
+                                        time.monotonic() - start, process.pid)
+    if not wait:
+        return 0
+
+    return_code = process.wait()
+    if launch_log is not None:
+        launch_log.exited(record_id, return_code, time.monotonic() - start)
+    return return_code
+
+
+def run_headless(args):
+    configuration, cfg = load_configuration(args)
+    menu_model = build_menu_model(configuration, cfg)
+    if menu_model.password is not None and \
+            not ask_password(menu_model.password, "Password: "):
+        sys.exit(-1)
+
+    if args.list:
+        print_items(iter_items(menu_model))
+    elif args.find is not None:
+        scores = None
+        if not args.no_launch_log:
+            scores = usage_store().get_scores()
+        items = find_items(menu_model, args.find, scores)
+        print_items(items)
+        if not items:
+            sys.exit(1)
+    else:
+        path = " > ".join(part.strip() for part in args.run.split(">"))
+        for item in iter_items(menu_model):
+            if item.get_path() == path:
+                break
+        else:
+            logging.error("Item \"" + path + "\" not found.")
+            sys.exit(1)
+
+        log = None
+        usage = None
+        if not args.no_launch_log:
+            log = launch_log(args.launch_log)
+            usage = usage_store()
+        sys.exit(run_item(item, log, args.wait, usage))
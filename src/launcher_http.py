@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+# Loading of menus, mappings and themes from web servers. Connections are
+# kept open and reused for following files from the same server, instead of
+# opening a new connection (and TLS session) for each file.
+
+import io
+import os
+import ssl
+import gzip
+import time
+import threading
+import collections
+import http.client
+from urllib.parse import urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass, urlopen
+from urllib.error import URLError, HTTPError
+
+GZIP_MAGIC = b"\x1f\x8b"
+REDIRECT_STATUS = (301, 302, 303, 307, 308)
+# Temporary server errors, request is repeated
+RETRY_STATUS = (429, 502, 503, 504)
+MAX_REDIRECTS = 5
+
+
+def is_http_url(file_path):
+    return file_path.startswith(("http://", "https://"))
+
+
+def decompress_gzip(data):
+    """Return data of gzip file, other data is returned as it is."""
+
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    return data
+
+
+class response_file(io.BytesIO):
+
+    """Loaded file, compatible with urlopen result."""
+
+    def __init__(self, data, url, headers=None):
+        io.BytesIO.__init__(self, data)
+        self.url = url
+        self.headers = headers
+
+    def geturl(self):
+        return self.url
+
+
+class http_pool(object):
+
+    """Thread safe pool of keep-alive connections per server.
+
+    A connection is taken from the pool for one request and returned when
+    the response was read, so each connection is used by one thread at a
+    time. Failed requests are repeated retries times, waiting backoff,
+    2 * backoff, 4 * backoff, ... seconds in between. Responses compressed
+    with gzip are decompressed.
+    """
+
+    def __init__(self, timeout=10.0, retries=2, backoff=0.2, max_idle=4):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.idle = collections.defaultdict(list)
+        self.ssl_context = None
+        # Number of opened connections, to check reuse
+        self.connections = 0
+
+    def get_connection(self, scheme, netloc):
+        """Return (connection, True if it was used before)."""
+
+        with self.lock:
+            connections = self.idle[(scheme, netloc)]
+            if connections:
+                return connections.pop(), True
+            self.connections += 1
+            if scheme == "https" and self.ssl_context is None:
+                self.ssl_context = ssl.create_default_context()
+
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                netloc, timeout=self.timeout, context=self.ssl_context), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+
+    def release(self, scheme, netloc, connection):
+        with self.lock:
+            connections = self.idle[(scheme, netloc)]
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def fetch(self, url):
+        """Return (status, reason, headers, body) of one GET request."""
+
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        attempt = 0
+        while True:
+            connection, reused = self.get_connection(parts.scheme,
+                                                     parts.netloc)
+            try:
+                connection.request("GET", path, headers={
+                    "Accept-Encoding": "gzip",
+                    "User-Agent": "pylauncher"})
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused:
+                    # Server closed the idle connection, not a failure
+                    continue
+                if attempt >= self.retries:
+                    raise URLError(e)
+            else:
+                if response.will_close:
+                    connection.close()
+                else:
+                    self.release(parts.scheme, parts.netloc, connection)
+                if response.status not in RETRY_STATUS or \
+                        attempt >= self.retries:
+                    return response.status, response.reason, \
+                        response.headers, data
+
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def open(self, url):
+        """Return response_file with content of url.
+
+        Raises HTTPError if server responds with an error and URLError if
+        server cannot be reached.
+        """
+
+        for _ in range(MAX_REDIRECTS + 1):
+            status, reason, headers, data = self.fetch(url)
+            if status in REDIRECT_STATUS and headers.get("Location"):
+                url = urljoin(url, headers["Location"])
+                continue
+            if status >= 400:
+                raise HTTPError(url, status, reason, headers, None)
+            if headers.get("Content-Encoding", "").lower() == "gzip":
+                data = gzip.decompress(data)
+            return response_file(data, url, headers)
+        raise URLError("Too many redirects when loading \"" + url + "\".")
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+# Pool shared by the whole launcher. Settings can be changed with
+# environment variables.
+default_pool = http_pool(
+    timeout=float(os.environ.get("PYLAUNCHER_HTTP_TIMEOUT", 10)),
+    retries=int(os.environ.get("PYLAUNCHER_HTTP_RETRIES", 2)),
+    backoff=float(os.environ.get("PYLAUNCHER_HTTP_BACKOFF", 0.2)))
+
+
+def open_http_file(url):
+    """Open url with the shared pool.
+
+    If a proxy is configured for the server, it is opened with urlopen,
+    which uses the proxy.
+    """
+
+    scheme, netloc = urlsplit(url)[:2]
+    if scheme in getproxies() and not proxy_bypass(netloc):
+        with urlopen(url, timeout=default_pool.timeout) as url_file:
+            return response_file(url_file.read(), url_file.geturl(),
+                                 url_file.headers)
+    return default_pool.open(url)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+# Incremental reading of JSON menu files. Generated menus can have tens of
+# thousands of items in one file. Instead of reading the whole file, decoding
+# it and parsing it at once, the file is read in chunks and elements of the
+# "menu" array are returned one by one as soon as they are read.
+
+import re
+import json
+import codecs
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARS = "0123456789.eE+-"
+
+
+class json_menu_reader(object):
+
+    """Read top level object of a JSON menu file key by key.
+
+    Only the part of the file which is not parsed yet is kept in memory.
+    Errors in the file raise ValueError with the line and column in the
+    whole file.
+    """
+
+    def __init__(self, menu_file, chunk_size=CHUNK_SIZE):
+        self.menu_file = menu_file
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        # Lines in the part of the file which was dropped and characters
+        # of its last line
+        self.lines = 0
+        self.columns = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """Read next chunk of the file. Return False at end of file."""
+
+        if self.eof:
+            return False
+        data = self.menu_file.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+        text = self.text_decoder.decode(data, final=self.eof)
+        line_start = self.buffer.rfind("\n", 0, self.pos)
+        if line_start < 0:
+            self.columns += self.pos
+        else:
+            self.lines += self.buffer.count("\n", 0, self.pos)
+            self.columns = self.pos - line_start - 1
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return bool(data)
+
+    def error(self, msg, pos):
+        line = self.lines + self.buffer.count("\n", 0, pos) + 1
+        line_start = self.buffer.rfind("\n", 0, pos)
+        column = pos - line_start
+        if line_start < 0:
+            column += self.columns
+        return ValueError("{}: line {} column {}".format(msg, line, column))
+
+    def peek(self):
+        """Skip white space and return next character ("" at end)."""
+
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars, msg):
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(msg, self.pos)
+        self.pos += 1
+        return char
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer,
+                                                          self.pos)
+            except json.JSONDecodeError as e:
+                # Value may continue in the next chunk. Read at least as
+                # much as is already buffered, so long values are not
+                # parsed again for each chunk.
+                error_offset = e.pos - self.pos
+                if self.fill(max(self.chunk_size,
+                                 len(self.buffer) - self.pos)):
+                    continue
+                raise self.error(e.msg, self.pos + error_offset)
+            if (end == len(self.buffer) or
+                    self.buffer[end] in NUMBER_CHARS) and self.fill():
+                # Number at the end of chunk may continue in the next one
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        self.expect("[", "Expecting '['")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.expect(",]", "Expecting ',' delimiter") == "]":
+                return
+
+    def iter_object(self, array_key):
+        """Yield (key, value) of the top level object.
+
+        Value of array_key is an iterator over elements of the array, which
+        must be consumed before the next key is read.
+        """
+
+        self.expect("{", "Expecting value")
+        if self.peek() == "}":
+            self.pos += 1
+        else:
+            while True:
+                if self.peek() != '"':
+                    raise self.error(
+                        "Expecting property name enclosed in double quotes",
+                        self.pos)
+                key = self.read_value()
+                self.expect(":", "Expecting ':' delimiter")
+                if key == array_key and self.peek() == "[":
+                    yield key, self.iter_array()
+                else:
+                    yield key, self.read_value()
+                if self.expect(",}", "Expecting ',' delimiter") == "}":
+                    break
+        if self.peek():
+            raise self.error("Extra data", self.pos)
+
+
+def iter_menu_json(menu_file):
+    """Yield (key, value) of menu file, "menu" value is an item iterator."""
+
+    return json_menu_reader(menu_file).iter_object("menu")
@@ -6,7 +6,8 @@
 
 import sys
 from urllib.request import urlopen
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
 from urllib.error import URLError
 
 import os
@@ -16,35 +17,216 @@ import logging
 import hashlib
 import sys
 
+from .launcher_spawn import merge_resources, check_resources
+from .launcher_tcl import is_tcl_menu, get_level_path, load_tcl_menu
+from .launcher_bundle import open_bundle_file, is_bundle_path
+from .launcher_json import iter_menu_json
+from .launcher_http import is_http_url, open_http_file, response_file, \
+    decompress_gzip
+
+# Macro in items of repeat items, e.g. $(DEVICE)
+MACRO_PATTERN = re.compile(r"\$\((\w+)\)")
+# Mandatory parameters of build-in types defined by repeat items. Checked
+# before the item is built, which would exit if any is missing.
+REPEAT_MANDATORY_PARAMS = {"menu": ["text", "file"], "title": ["text"]}
+
 def join_launcher_path(base, file):
-    # In case file is absolute path ora full url, base will be ignored
-    try:
-        urlopen(file)
-        joined_path = file
+    # In case file is absolute path or a full url, base will be ignored.
+    # Decided from the paths only, without opening them, so joining paths
+    # of menus on a web server needs no requests.
+    if "://" in file:
+        return file
+    if "://" in base:
+        if not base.endswith("/"):
+            base += "/"
+        return urljoin(base, file)
+    return os.path.join(base, file)
 
-    except (URLError, ValueError):
-        try:
-            urlopen(base)
-            urljoin(base, file)
-        except (URLError, ValueError):
-            joined_path = os.path.join(base, file)
+def url_to_path(file_path):
+    """Return local path of file:// url, other paths are returned as they are."""
+
+    if file_path.startswith("file:"):
+        return url2pathname(urlparse(file_path).path)
+    return file_path
+
+
+def normalize_menu_path(menu_path):
+    """Return the same path for all paths and file urls of a menu file."""
+
+    path = url_to_path(menu_path)
+    if "://" in path:
+        return path
+    return os.path.realpath(path)
 
-    return joined_path
 
 def open_launcher_file(file_path):
-    launcher_file = None
-    try:
-        launcher_file = urlopen(file_path)
-    except (URLError, ValueError):
-        # Change path to url style and try to open it
-        launcher_file_path = os.path.normpath(file_path)
-        launcher_file_path = os.path.abspath(launcher_file_path)
-        launcher_file_path = 'file:///' + launcher_file_path
-        launcher_file = urlopen(launcher_file_path)
+    launcher_file = open_bundle_file(file_path)
+    if launcher_file is not None:
+        return launcher_file
+
+    if is_http_url(file_path):
+        launcher_file = open_http_file(file_path)
+    else:
+        try:
+            launcher_file = urlopen(file_path)
+        except (URLError, ValueError):
+            # Change path to url style and try to open it
+            launcher_file_path = os.path.normpath(file_path)
+            launcher_file_path = os.path.abspath(launcher_file_path)
+            launcher_file_path = 'file:///' + launcher_file_path
+            launcher_file = urlopen(launcher_file_path)
+
+    if file_path.endswith(".gz"):
+        # Compressed menu (e.g. menu.json.gz)
+        with launcher_file:
+            launcher_file = response_file(
+                decompress_gzip(launcher_file.read()), launcher_file.geturl())
 
     return launcher_file
 
 
+def get_menu_files(menu_model):
+    """Return local files of menu and all its submenus.
+
+    Urls and bundled menus are not included, their changes cannot be
+    detected from the file system.
+    """
+
+    files = list()
+    models = [menu_model]
+    while models:
+        model = models.pop()
+        path = url_to_path(model.menu_path)
+        if "://" not in path and not is_bundle_path(path):
+            files.append(os.path.abspath(path))
+        for item in model.menu_items:
+            if isinstance(item, launcher_sub_menu_item):
+                models.append(item.sub_menu)
+    return files
+
+
+def count_menu_items(menu_model):
+    """Return number of items of menu and all its submenus."""
+
+    count = 0
+    models = [menu_model]
+    while models:
+        model = models.pop()
+        count += len(model.menu_items)
+        for item in model.menu_items:
+            if isinstance(item, launcher_sub_menu_item):
+                models.append(item.sub_menu)
+    return count
+
+
+def get_files_signature(files):
+    """Return modification times and sizes of files to detect changes."""
+
+    signature = list()
+    for file_path in files:
+        try:
+            stat = os.stat(file_path)
+            signature.append((file_path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((file_path, None, None))
+    return signature
+
+
+def format_launcher_template(template, arg_flags, item):
+    """Replace each {arg} in template with flag and value of item[arg]."""
+
+    args = re.findall(r'{(\w+)}', template)
+
+    params = dict()
+    for arg in args:
+        if item.get(arg):
+            params[arg] = arg_flags.get(arg, "") + " " + item.get(arg)
+        else:
+            params[arg] = ""
+
+    return template.format(**params)
+
+
+def substitute_macros(value, macros):
+    """Replace each $(NAME) in strings of value with macros[NAME].
+
+    Unknown macros are left as they are, so shell command substitutions
+    like $(hostname) still work.
+    """
+
+    if isinstance(value, str):
+        return MACRO_PATTERN.sub(
+            lambda match: macros.get(match.group(1), match.group(0)), value)
+    if isinstance(value, list):
+        return [substitute_macros(element, macros) for element in value]
+    if isinstance(value, dict):
+        return {key: substitute_macros(element, macros)
+                for key, element in value.items()}
+    return value
+
+
+def get_repeat_macros(item):
+    """Return list of macro dictionaries, one per item defined by repeat item.
+
+    Values are given as "values" (list of values of "macro" or of objects
+    with several macros) or as "range": [first, last] or [first, last, step]
+    formatted with "format" (default "%d"). Raises ValueError if repeat item
+    is not valid.
+    """
+
+    macro = item.get("macro")
+    if "range" in item:
+        item_range = item["range"]
+        if not isinstance(item_range, list) or len(item_range) not in (2, 3) \
+                or not all(isinstance(i, int) for i in item_range) or \
+                0 in item_range[2:]:
+            raise ValueError("\"range\" must be [first, last] or "
+                             "[first, last, step] of integers.")
+        first, last = item_range[:2]
+        step = item_range[2] if len(item_range) == 3 else 1
+        item_format = item.get("format", "%d")
+        try:
+            values = [item_format % i for i in
+                      range(first, last + (1 if step > 0 else -1), step)]
+        except (TypeError, ValueError):
+            raise ValueError("\"format\" must format one integer "
+                             "(e.g. \"%02d\").")
+    else:
+        values = item.get("values")
+        if not isinstance(values, list):
+            raise ValueError("\"values\" or \"range\" is mandatory.")
+
+    macros = list()
+    for value in values:
+        if isinstance(value, dict):
+            macros.append({name: str(macro_value)
+                           for name, macro_value in value.items()})
+        elif not macro:
+            raise ValueError("\"macro\" is mandatory for values which are "
+                             "not objects.")
+        else:
+            macros.append({macro: str(value)})
+    return macros
+
+
+def expand_repeat_item(item):
+    """Yield configs of items defined by repeat item.
+
+    Template "item" may itself be a repeat item, which is expanded for each
+    value of the outer one.
+    """
+
+    template = item.get("item")
+    if not isinstance(template, dict):
+        raise ValueError("\"item\" must be an object.")
+    for macros in get_repeat_macros(item):
+        expanded = substitute_macros(template, macros)
+        if expanded.get("type") == "repeat":
+            yield from expand_repeat_item(expanded)
+        else:
+            yield expanded
+
+
 class launcher_menu_model(object):
 
     """Parse configuration and build menu model.
@@ -60,6 +242,8 @@ class launcher_menu_model(object):
         main_title: holding the title of the menu
         level: holding the level of the menu (main = 0, sub of main = 1, ...)
         list of menu_items: list of all launcher_menu_model_items
+
+    Repeat items are replaced by the items they define while parsing.
     """
 
     def __init__(self, parent, menu_file_path, level, launcher_cfg):
@@ -70,34 +254,89 @@ class launcher_menu_model(object):
         self.menu_path = menu_file_path
         self.flags = {}
 
-        # open file
-        menu_file = open_launcher_file(menu_file_path)
-        self.parse_menu_json(menu_file, launcher_cfg)
-        menu_file.close()
+        if is_tcl_menu(menu_file_path) and not is_bundle_path(menu_file_path):
+            # Legacy menu, converted in memory. Levels are defined for the
+            # whole tree next to the root menu.
+            root_menu = self
+            while root_menu.parent is not None:
+                root_menu = root_menu.parent.parent
+            menu_file_path = url_to_path(menu_file_path)
+            menu = load_tcl_menu(
+                menu_file_path,
+                get_level_path(url_to_path(root_menu.menu_path)))
+            self.parse_menu(menu, menu_file_path, launcher_cfg)
+        else:
+            # open file
+            menu_file = open_launcher_file(menu_file_path)
+            self.parse_menu_json(menu_file, launcher_cfg)
+            menu_file.close()
 
     def parse_menu_json(self, menu_file, launcher_cfg):
-        """Parse JSON type menu config file."""
+        """Parse JSON type menu config file.
+
+        File is parsed while it is read. Items of "menu" are built as soon as
+        they are read, so the whole file is never held in memory.
+        """
+
+        menu_url = menu_file.geturl()
+        menu = dict()
+        parsed_items = False
+        for key, value in self.check_menu_json(iter_menu_json(menu_file),
+                                               menu_url):
+            if key == "menu" and not parsed_items:
+                # Items need only the password of the menu. Other keys are
+                # applied when the whole file is read.
+                self.password = menu.get("password", None)
+                self.parse_menu_items(self.check_menu_json(value, menu_url),
+                                      menu_url, launcher_cfg)
+                parsed_items = True
+            else:
+                menu[key] = value
+
+        if not parsed_items:
+            self.parse_menu_items(list(), menu_url, launcher_cfg)
+        self.parse_menu_header(menu, menu_url)
+
+    def check_menu_json(self, values, menu_url):
+        """Yield values read from menu file, exit if file is not valid."""
 
         try:
-            menu = json.loads(menu_file.read().decode('utf-8'))
-        except Exception as e:
-            err_msg = ("In file \"" + menu_file.geturl() + "\": " + e.args[0])
+            yield from values
+        except ValueError as e:
+            err_msg = ("In file \"" + menu_url + "\": " + str(e))
             logging.error(err_msg)
             sys.exit()
 
+    def parse_menu(self, menu, menu_url, launcher_cfg):
+        """Build menu model from menu config loaded from menu_url."""
+
+        self.password = menu.get("password", None)
+        self.parse_menu_items(menu.get("menu", list()), menu_url,
+                              launcher_cfg)
+        self.parse_menu_header(menu, menu_url)
+
+    def parse_menu_header(self, menu, menu_url):
+        """Set title, flags, password and views of the menu."""
+
         if 0 == self.level:
             self.flags = menu.get("flags", dict())
 
-        self.password = menu.get("password", None)
+        password = menu.get("password", None)
+        if password != self.password:
+            # Password defined after the items in the file
+            self.password = password
+            for menu_item in self.menu_items:
+                if hasattr(menu_item, "pwd"):
+                    menu_item.pwd = password
 
         main_title_item = menu.get("menu-title", dict())
         self.main_title = launcher_main_title_item(
             main_title_item,
-            os.path.splitext(os.path.basename(menu_file.geturl()))[0])
+            os.path.splitext(os.path.basename(menu_url))[0])
 
         # Create file choice element that represents this menu
         self.choice_element = launcher_file_choice_item(
-                self, {"text": self.main_title.text, "file": menu_file.geturl()})
+                self, {"text": self.main_title.text, "file": menu_url})
         # Get list of possible views (e.g. expert, user)
 
         list_of_views = menu.get("file-choice", list())
@@ -116,58 +355,107 @@ class launcher_menu_model(object):
                 self.file_choices.append(launcher_file_choice_item(
                     self, view))
             except IOError:
-                warn_msg = "Parser: " + menu_file.geturl() + ": File \"" +\
+                warn_msg = "Parser: " + menu_url + ": File \"" +\
                     file_name + "\" not found. Skipped"
                 logging.warning(warn_msg)
 
-        # Build menu model. Report error if menu is not defined.
+    def parse_menu_items(self, list_of_menu_items, menu_url, launcher_cfg):
+        """Build menu model of items (list or iterator of item configs)."""
 
-        list_of_menu_items = menu.get("menu", list())
-        if not list_of_menu_items:
-            err_msg = "Parser: " + menu_file.geturl() +\
+        position = -1
+        for position, item in enumerate(list_of_menu_items):
+            if item.get("type") == "repeat":
+                self.parse_repeat_item(item, position, menu_url,
+                                       launcher_cfg)
+                continue
+            menu_item = self.build_menu_item(item, menu_url, launcher_cfg)
+            if menu_item is not None:
+                menu_item.position = position
+                self.menu_items.append(menu_item)
+
+        # Report error if menu is not defined.
+        if position < 0:
+            err_msg = "Parser: " + menu_url +\
                 ": Launcher menu is empty."
             logging.error(err_msg)
             # sys.exit() # We should not return in this case
 
-        for item in list_of_menu_items:
-            menu_item = None
-            item_type = item.get("type", "")
-            # For each check mandatory parameters and exit if not all.
-            # Custom types can be defined in launcher main config.json file.
-            # Custom types are predefine shell commands. First check if on of
-            # custom types, then check standard types such as menu, title,
-            # separator.
-
-            if launcher_cfg.get(item_type):
-                item_cfg = launcher_cfg.get(item_type)
-                # self.check_item_format_json(item, item_type,
-                #                            ["text", "params"])
+    def build_menu_item(self, item, menu_url, launcher_cfg):
+        """Return model of item config, None if it is skipped."""
+
+        menu_item = None
+        item_type = item.get("type", "")
+        # For each check mandatory parameters and exit if not all.
+        # Custom types can be defined in launcher main config.json file.
+        # Custom types are predefine shell commands. First check if on of
+        # custom types, then check standard types such as menu, title,
+        # separator.
+
+        if launcher_cfg.get(item_type):
+            item_cfg = launcher_cfg.get(item_type)
+            # self.check_item_format_json(item, item_type,
+            #                            ["text", "params"])
+            if "action" in item_cfg:
+                menu_item = launcher_action_item(self, item_cfg, item)
+            else:
                 menu_item = launcher_cmd_item(self, item_cfg, item)
 
-            elif item_type == "menu":
-                self.check_item_format_json(item, item_type, ["text", "file"])
-                try:
-                    menu_item = launcher_sub_menu_item(self, launcher_cfg,
-                                                       item)
-                except IOError:
-                    warn_msg = "Parser: " + menu_file.geturl() + \
-                        ": File \"" + item.get("file") + "\" not found. " + \
-                        "Skipped"
-                    logging.warning(warn_msg)
+        elif item_type == "menu":
+            self.check_item_format_json(item, item_type, ["text", "file"])
+            try:
+                menu_item = launcher_sub_menu_item(self, launcher_cfg,
+                                                   item)
+            except IOError:
+                warn_msg = "Parser: " + menu_url + \
+                    ": File \"" + item.get("file") + "\" not found. " + \
+                    "Skipped"
+                logging.warning(warn_msg)
 
-            elif item_type == "title":
-                self.check_item_format_json(item, item_type, ["text"])
-                menu_item = launcher_title_item(self, item)
+        elif item_type == "title":
+            self.check_item_format_json(item, item_type, ["text"])
+            menu_item = launcher_title_item(self, item)
 
-            elif item_type == "separator":
-                menu_item = launcher_item_separator(self, item)
+        elif item_type == "separator":
+            menu_item = launcher_item_separator(self, item)
 
-            else:
-                warn_msg = "Parser:" + menu_file.geturl() + \
-                    ": Unknown type \"" + item_type + "\". Skipped"
+        else:
+            warn_msg = "Parser:" + menu_url + \
+                ": Unknown type \"" + item_type + "\". Skipped"
+            logging.warning(warn_msg)
+
+        return menu_item
+
+    def parse_repeat_item(self, item, position, menu_url, launcher_cfg):
+        """Build items defined by repeat item at position.
+
+        Invalid repeat items and templates are skipped with a warning, as
+        items of unknown types are.
+        """
+
+        try:
+            templates = list(expand_repeat_item(item))
+        except ValueError as e:
+            warn_msg = "Parser: " + menu_url + \
+                ": Repeat item: " + str(e) + " Skipped"
+            logging.warning(warn_msg)
+            return
+
+        for index, template in enumerate(templates):
+            missing = [param for param in
+                       REPEAT_MANDATORY_PARAMS.get(template.get("type"), [])
+                       if not template.get(param)]
+            if missing:
+                warn_msg = "Parser: " + menu_url + \
+                    ": Repeat item: Parameter \"" + missing[0] + \
+                    "\" is mandatory in \"" + template.get("type") + \
+                    "\". Skipped"
                 logging.warning(warn_msg)
+                continue
 
+            menu_item = self.build_menu_item(template, menu_url, launcher_cfg)
             if menu_item is not None:
+                # Items of repeat item at position 3 are at 3.0, 3.1, ...
+                menu_item.position = str(position) + "." + str(index)
                 self.menu_items.append(menu_item)
 
     def check_item_format_json(self, item, item_name, mandatory_param):
@@ -203,6 +491,8 @@ class launcher_menu_model_item(object):
 
     def __init__(self, parent, item):
         self.parent = parent
+        # Index in "menu" of the menu file, set by the parser
+        self.position = None
         self.text = item.get("text", None)
         self.help_link = item.get("help-link", None)
         self.tip = item.get("tip", "").strip()
@@ -221,6 +511,22 @@ class launcher_menu_model_item(object):
             else:
                 self.trace = list()
 
+    def get_path(self):
+        """Return path of the item as "Submenu > Submenu > Item"."""
+
+        return " > ".join([trace_item.text for trace_item in self.trace] +
+                          [self.text])
+
+    def get_id(self):
+        """Return id of the item from its menu file and position in it.
+
+        Id stays the same as long as items are not moved in the file, and is
+        the same wherever the menu file is used as submenu.
+        """
+
+        return normalize_menu_path(self.parent.menu_path) + "#" + \
+            str(self.position)
+
     def __repr__(self):
         return "{}: {}".format(self.__class__.__name__, self.text)
 
@@ -248,20 +554,40 @@ class launcher_cmd_item(launcher_menu_model_item):
 
     def __init__(self, parent, item_cfg, item):
         launcher_menu_model_item.__init__(self, parent, item)
-        self.cmd = item_cfg.get("command")
-        arg_flags = item_cfg.get("arg_flags", dict())
-        args = re.findall('{(\w+)}', self.cmd)
-
-        params = dict()
-        for arg in args:
-            if item.get(arg):
-                params[arg] = arg_flags.get(arg, "") + " " + item.get(arg)
-            else:
-                params[arg] = ""
+        self.cmd = format_launcher_template(item_cfg.get("command"),
+                                            item_cfg.get("arg_flags", dict()),
+                                            item)
 
-        self.cmd = self.cmd.format(**params)
+        self.pwd = parent.password
+        # Optional nice, ionice, rlimit and cpu-affinity settings for the
+        # started process. Validated once here and applied at each launch.
+        self.resources = check_resources(
+            merge_resources(item_cfg, item),
+            parent.menu_path + ": \"" + str(self.text) + "\"")
+
+class launcher_action_item(launcher_cmd_item):
+
+    """Item which runs an action inside the launcher.
+
+    Instead of a shell command the type defines an action (e.g. "url",
+    "open-file" or a name of registered entry point action) and its target,
+    which is built the same way as a command.
+    """
+
+    def __init__(self, parent, item_cfg, item):
+        launcher_menu_model_item.__init__(self, parent, item)
+        self.action = item_cfg.get("action")
+        self.cmd = format_launcher_template(item_cfg.get("target", ""),
+                                            item_cfg.get("arg_flags", dict()),
+                                            item).strip()
+        if self.action == "open-file":
+            # relative paths to the menu file where this item is defined
+            self.cmd = join_launcher_path(os.path.dirname(parent.menu_path),
+                                          os.path.expanduser(self.cmd))
 
         self.pwd = parent.password
+        self.resources = dict()
+
 
 class launcher_sub_menu_item(launcher_menu_model_item):
 
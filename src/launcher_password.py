@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import hmac
+import time
+import hashlib
+
+KDF_NAME = "pbkdf2_sha256"
+KDF_ITERATIONS = 200000
+
+
+def hash_password(password, salt=None, iterations=KDF_ITERATIONS):
+    """Return salted hash of password to be stored in menu file.
+
+    Format is "pbkdf2_sha256$<iterations>$<salt>$<hash>".
+    """
+
+    if salt is None:
+        salt = os.urandom(16).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(),
+                                 iterations)
+    return "$".join([KDF_NAME, str(iterations), salt, digest.hex()])
+
+
+def is_salted(stored):
+    return stored.startswith(KDF_NAME + "$")
+
+
+def check_password(password, stored):
+    """Check password against hash stored in menu file.
+
+    Besides salted hashes also plain MD5 hashes of older menu files are
+    supported.
+    """
+
+    if is_salted(stored):
+        try:
+            _, iterations, salt, _ = stored.split("$")
+            expected = hash_password(password, salt, int(iterations))
+        except ValueError:
+            return False
+    else:
+        expected = hashlib.md5(password.encode()).hexdigest()
+    return hmac.compare_digest(expected, stored)
+
+
+class unlock_cache(object):
+
+    """Remember which passwords were entered in this session.
+
+    Entries are keyed by the stored password hash, so all items protected
+    with the same hash are unlocked at once and the password itself is not
+    kept. An entry expires when it was not used for timeout seconds.
+    Timeout 0 disables the cache.
+    """
+
+    def __init__(self, timeout=300):
+        self.timeout = timeout
+        self.unlocked = dict()
+
+    def is_unlocked(self, stored):
+        now = time.monotonic()
+        last_use = self.unlocked.get(stored)
+        if last_use is None:
+            return False
+        if now - last_use >= self.timeout:
+            del self.unlocked[stored]
+            return False
+        self.unlocked[stored] = now
+        return True
+
+    def unlock(self, stored):
+        if self.timeout > 0:
+            self.unlocked[stored] = time.monotonic()
+
+    def lock(self):
+        self.unlocked.clear()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import time
+import ctypes
+import shlex
+import shutil
+import functools
+import weakref
+import logging
+import collections
+import platform
+import subprocess
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows
+
+# Settings which can be defined for a type in mapping file or for a single
+# menu item. Settings of menu item override settings of its type.
+RESOURCE_KEYS = ("nice", "ionice", "rlimit", "cpu-affinity")
+
+IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+# ioprio_set has no wrapper in libc, so it is called by syscall number.
+IOPRIO_SET_SYSCALL = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+# libc.syscall, loaded once in the launcher. Loading a library in the child
+# between fork and exec of a threaded process is not safe.
+_syscall = None
+
+
+def merge_resources(item_cfg, item):
+    """Return resource settings of item, overriding settings of its type."""
+
+    settings = dict()
+    for source in (item_cfg, item):
+        for key in RESOURCE_KEYS:
+            if key in source:
+                settings[key] = source[key]
+    return settings
+
+
+def check_resources(settings, location):
+    """Validate resource settings and return the valid ones.
+
+    Invalid settings are reported and skipped, so they do not fail at every
+    launch. location is used in messages to point to the item.
+    """
+
+    valid = dict()
+    if not settings:
+        return valid
+
+    if os.name != "posix":
+        warn_msg = "Parser: " + location + ": Resource settings are not " +\
+            "supported on this system. Ignored."
+        logging.warning(warn_msg)
+        return valid
+
+    for key, value in settings.items():
+        try:
+            if key == "nice":
+                valid[key] = _check_nice(value)
+            elif key == "ionice":
+                valid[key] = _check_ionice(value)
+            elif key == "rlimit":
+                valid[key] = _check_rlimit(value)
+            elif key == "cpu-affinity":
+                valid[key] = _check_affinity(value)
+        except ValueError as e:
+            warn_msg = "Parser: " + location + ": Invalid \"" + key +\
+                "\" setting (" + str(e) + "). Ignored."
+            logging.warning(warn_msg)
+
+    return valid
+
+
+def _check_nice(value):
+    if not isinstance(value, int) or isinstance(value, bool) or \
+            not -20 <= value <= 19:
+        raise ValueError("integer from -20 to 19 expected")
+    return value
+
+
+def _check_ionice(value):
+    if not isinstance(value, dict):
+        raise ValueError("{\"class\": ..., \"level\": ...} expected")
+    io_class = value.get("class", "best-effort")
+    if io_class not in IOPRIO_CLASSES:
+        raise ValueError("class must be one of " +
+                         ", ".join(sorted(IOPRIO_CLASSES)))
+    level = value.get("level", 4)
+    if not isinstance(level, int) or not 0 <= level <= 7:
+        raise ValueError("level must be integer from 0 to 7")
+    if platform.system() != "Linux" or \
+            platform.machine() not in IOPRIO_SET_SYSCALL:
+        raise ValueError("not supported on this system")
+    if io_class == "idle":
+        level = 0
+    return (IOPRIO_CLASSES[io_class] << IOPRIO_CLASS_SHIFT) | level
+
+
+def _check_rlimit(value):
+    if resource is None:
+        raise ValueError("not supported on this system")
+    if not isinstance(value, dict):
+        raise ValueError("{\"<limit>\": <value>} expected")
+    limits = dict()
+    for name, limit in value.items():
+        rlimit = getattr(resource, "RLIMIT_" + name.upper(), None)
+        if rlimit is None:
+            raise ValueError("unknown limit \"" + name + "\"")
+        if isinstance(limit, int):
+            soft = hard = limit
+        elif isinstance(limit, list) and len(limit) == 2 and \
+                all(isinstance(l, int) for l in limit):
+            soft, hard = limit
+        else:
+            raise ValueError("limit \"" + name + "\" must be integer or " +
+                             "[soft, hard]")
+        limits[rlimit] = (soft, hard)
+    return limits
+
+
+def _check_affinity(value):
+    if not hasattr(os, "sched_setaffinity"):
+        raise ValueError("not supported on this system")
+    if not isinstance(value, list) or not value or \
+            not all(isinstance(cpu, int) and cpu >= 0 for cpu in value):
+        raise ValueError("non empty list of CPU numbers expected")
+    return set(value)
+
+
+def _get_syscall():
+    global _syscall
+    if _syscall is None:
+        _syscall = ctypes.CDLL(None, use_errno=True).syscall
+    return _syscall
+
+
+def _apply_resources(resources, syscall=None):
+    """Apply validated resources to current process.
+
+    Runs in the child between fork and exec, so it must not log, import,
+    load libraries or start threads. syscall must be resolved by the parent
+    if "ionice" is set. Errors are reported to the parent by subprocess.
+    """
+
+    if "nice" in resources:
+        os.nice(resources["nice"])
+    if "ionice" in resources:
+        if syscall(IOPRIO_SET_SYSCALL[platform.machine()],
+                   IOPRIO_WHO_PROCESS, 0, resources["ionice"]) != 0:
+            raise OSError(ctypes.get_errno(), "ioprio_set failed")
+    for rlimit, limits in resources.get("rlimit", dict()).items():
+        resource.setrlimit(rlimit, limits)
+    if "cpu-affinity" in resources:
+        os.sched_setaffinity(0, resources["cpu-affinity"])
+
+
+def spawn_cmd(cmd, resources=None, env=None, cwd=None):
+    """Start shell command as a separate process and return it.
+
+    Resources are applied in the child before the command is executed.
+    Command is started with environment env (its PATH is used to find the
+    program) in directory cwd, by default the ones of the launcher. Raises
+    OSError if command cannot be executed.
+    """
+
+    preexec_fn = None
+    if resources:
+        syscall = None
+        if "ionice" in resources:
+            syscall = _get_syscall()
+
+        def preexec_fn():
+            _apply_resources(resources, syscall)
+
+    try:
+        return subprocess.Popen(shlex.split(cmd), preexec_fn=preexec_fn,
+                                env=env, cwd=cwd)
+    except subprocess.SubprocessError as e:
+        # Resources could not be applied in the child
+        raise OSError(str(e))
+
+
+# Shells which run command given with -c. Executable of such command is the
+# first word of the command.
+SHELLS = ("sh", "bash", "csh", "tcsh", "zsh", "ksh")
+# Commands run by the shell itself (or functions defined by environment
+# modules), which are not looked up on PATH
+SHELL_BUILTINS = (".", "source", "cd", "export", "set", "unset", "setenv",
+                  "eval", "exec", "alias", "if", "for", "while", "case", "{",
+                  "(", "[[", "[", "!", "test", "ulimit", "umask", "time",
+                  "exit", "return", "wait", "trap", "read", "shift",
+                  "command", "builtin", "type", "hash", "pushd", "popd",
+                  "module", "ml")
+# Characters which make a shell command more than one simple command
+SHELL_METACHARACTERS = set(";&|()$`<>\n")
+# First characters of words expanded by the shell
+SHELL_EXPANSIONS = ("(", "$", "`")
+
+# {name: (PATH signature, full path or None)} of looked up executables
+_which_cache = dict()
+
+
+def get_path_signature(path=None):
+    """Return path (default PATH) and modification times of its directories.
+
+    Installing or removing a program changes modification time of its
+    directory, so a lookup is valid as long as the signature is the same.
+    """
+
+    if path is None:
+        path = os.environ.get("PATH", os.defpath)
+    signature = [path]
+    for directory in path.split(os.pathsep):
+        try:
+            signature.append(os.stat(directory or os.curdir).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def which(name, signature=None):
+    """Return full path of executable name or None.
+
+    Name is looked up on the path of signature (default PATH). Results are
+    cached per name until the path or any of its directories changes.
+    Signature from get_path_signature can be passed when many names are
+    looked up at once.
+    """
+
+    if signature is None:
+        signature = get_path_signature()
+    cached = _which_cache.get(name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    path = shutil.which(name, path=signature[0])
+    _which_cache[name] = (signature, path)
+    return path
+
+
+@functools.lru_cache(maxsize=4096)
+def get_executable(cmd):
+    """Return name of executable started by command or None if unknown."""
+
+    try:
+        argv = shlex.split(cmd)
+    except ValueError:
+        return None
+    while argv and "=" in argv[0] and not argv[0].startswith("="):
+        argv.pop(0)  # Environment variable assignment
+    if not argv or argv[0].rstrip(";") in SHELL_BUILTINS or \
+            argv[0].startswith(SHELL_EXPANSIONS):
+        return None
+    if os.path.basename(argv[0]) in SHELLS:
+        return get_shell_executable(argv)
+    return argv[0]
+
+
+def get_shell_executable(argv):
+    """Return executable started by shell argv, the shell if unknown.
+
+    Command given with -c is checked only if it is one simple command. Login
+    shells are not checked, because their profile can change PATH.
+    """
+
+    login = False
+    command = False
+    for i, arg in enumerate(argv[1:], 1):
+        if arg == "--login":
+            login = True
+        elif arg.startswith("-") and not arg.startswith("--"):
+            login = login or "l" in arg[1:]
+            command = command or "c" in arg[1:]
+        elif arg.startswith("--"):
+            continue
+        else:
+            break
+    else:
+        return argv[0]
+
+    if login or not command or SHELL_METACHARACTERS.intersection(argv[i]):
+        return argv[0]
+    return get_executable(argv[i]) or argv[0]
+
+
+def check_executable(cmd, signature=None):
+    """Return why command cannot be started, None if it can or is unknown.
+
+    Only programs looked up on PATH and absolute paths are checked. Paths
+    relative to the working directory or with variables are not.
+    """
+
+    executable = get_executable(cmd)
+    if not executable:
+        return None
+    if os.path.dirname(executable):
+        if not os.path.isabs(executable):
+            return None
+        if which(executable, signature) is None:
+            return "Program \"" + executable + "\" not found."
+    elif which(executable, signature) is None:
+        return "Program \"" + executable + "\" not found on PATH."
+    return None
+
+
+# Entry point group in which other packages can register actions for items
+# of types defined with "action" in mapping file.
+ACTION_ENTRY_POINT_GROUP = "pylauncher.actions"
+_actions = dict()
+
+
+def load_action(name):
+    """Return callable of entry point action, or None if not registered.
+
+    Loaded actions are cached, so entry points are scanned only once per
+    action.
+    """
+
+    if name not in _actions:
+        from importlib.metadata import entry_points
+        try:
+            points = entry_points(group=ACTION_ENTRY_POINT_GROUP)
+        except TypeError:  # Python < 3.10
+            points = entry_points().get(ACTION_ENTRY_POINT_GROUP, [])
+
+        _actions[name] = None
+        for point in points:
+            if point.name == name:
+                _actions[name] = point.load()
+                break
+
+    return _actions[name]
+
+
+class launch_guard(object):
+
+    """Suppress accidental repeated launches.
+
+    The same item cannot be launched again within cooldown seconds (e.g.
+    double click or key repeat) and no more than rate launches per second
+    are allowed in total. Suppressed launches are counted by reason.
+    """
+
+    def __init__(self, cooldown=1.0, rate=5):
+        self.cooldown = cooldown
+        self.rate = rate
+        self.last_launch = weakref.WeakKeyDictionary()
+        self.recent = collections.deque()
+        self.suppressed = {"cooldown": 0, "rate": 0}
+
+    def allow(self, item):
+        """Return None and register launch if item can be launched.
+
+        Otherwise return the reason why the launch was suppressed.
+        """
+
+        now = time.monotonic()
+        last = self.last_launch.get(item)
+        if last is not None and now - last < self.cooldown:
+            reason = "cooldown"
+        else:
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if self.rate and len(self.recent) >= self.rate:
+                reason = "rate"
+            else:
+                self.last_launch[item] = now
+                self.recent.append(now)
+                return None
+
+        self.suppressed[reason] += 1
+        return reason
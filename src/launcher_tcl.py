@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import sys
+import json
+import logging
+import hashlib
+import tempfile
+
+# Increase when the converter output changes, so cached menus are converted
+# again.
+CACHE_VERSION = 1
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME",
+                   os.path.join(os.path.expanduser("~"), ".cache")),
+    "pylauncher", "tcl")
+
+
+def is_tcl_menu(menu_file_path):
+    return menu_file_path.endswith(".config")
+
+
+def get_level_path(root_menu_path):
+    """Return level file of legacy menu tree (<root>.lvl)."""
+
+    return os.path.splitext(root_menu_path)[0] + ".lvl"
+
+
+def load_tcl_menu(menu_file_path, level_file_path):
+    """Return menu defined in legacy Tcl .config file.
+
+    File is converted with the converter of pylauncher-convert. Returned
+    menu has the same structure as JSON menus, except that it references
+    other .config files instead of converted .json files. Converted menus
+    are cached, keyed by content of .config and level files, so they are
+    converted only once. Raises IOError if file does not exist.
+    """
+
+    if not os.path.isfile(menu_file_path):
+        raise IOError("File \"" + menu_file_path + "\" not found.")
+
+    fingerprint = hashlib.sha1(str(CACHE_VERSION).encode())
+    with open(menu_file_path, "rb") as menu_file:
+        fingerprint.update(menu_file.read())
+    fingerprint.update(b"\0")
+    if os.path.isfile(level_file_path):
+        with open(level_file_path, "rb") as level_file:
+            fingerprint.update(level_file.read())
+    cache_file_path = os.path.join(CACHE_PATH,
+                                   fingerprint.hexdigest() + ".json")
+
+    dir_path = os.path.dirname(menu_file_path)
+    try:
+        with open(cache_file_path) as cache_file:
+            cached = json.load(cache_file)
+        # Conversion skips menus of missing files, which may exist now
+        if not any(os.path.isfile(os.path.join(dir_path, file_name))
+                   for file_name in cached["missing"]):
+            return cached["menu"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    menu, missing = convert_tcl_menu(menu_file_path, level_file_path)
+
+    try:
+        os.makedirs(CACHE_PATH, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=CACHE_PATH, suffix=".tmp",
+                                         delete=False) as cache_file:
+            json.dump({"menu": menu, "missing": missing}, cache_file)
+        os.replace(cache_file.name, cache_file_path)
+    except OSError as e:
+        logging.warning("Converted menu cannot be cached in \"" +
+                        CACHE_PATH + "\": " + str(e))
+
+    return menu
+
+
+def convert_tcl_menu(menu_file_path, level_file_path):
+    """Convert .config file and return menu and list of missing files."""
+
+    # Converter is only needed on cold start
+    from .convert.convert import LauncherMenuModel, LauncherLevelModel
+
+    try:
+        levels = dict()
+        if os.path.isfile(level_file_path):
+            levels = LauncherLevelModel(level_file_path).levels
+
+        dir_path, file_name = os.path.split(menu_file_path)
+        model = LauncherMenuModel(dir_path, file_name, levels, True)
+    except SystemExit:
+        logging.error("In file \"" + menu_file_path + "\": File cannot be " +
+                      "converted.")
+        sys.exit()
+
+    menu = model.json_config
+    menu["menu"] = model.menu_items
+
+    # Reference .config files instead of converted .json files
+    for item in menu.get("file-choice", list()) + menu["menu"]:
+        if "file" in item:
+            item["file"] = os.path.splitext(item["file"])[0] + ".config"
+
+    return menu, model.missing_files
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import glob
+import gzip
+import json
+import time
+import uuid
+import logging
+import platform
+
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".pylauncher",
+                                "launches.log")
+
+
+class launch_log(object):
+
+    """Append-only log of launches.
+
+    Each launch is written as one JSON line when the process is started and
+    one more when it exits. Lines are appended with a single write, so
+    several launcher instances can share the same log. When the log grows
+    over max_bytes, it is rotated into a gzip archive in which launch and
+    exit records are merged into one record per launch. Only the newest
+    keep archives are kept.
+
+    Records (keys are kept short to keep the log compact):
+        launch: {"e": "launch", "id", "t", "h", "p", "a", "l", "pid"}
+        exit: {"e": "exit", "id", "t", "rc", "rt"}
+        suppressed: {"e": "suppressed", "t", "h", "p", "r"}
+    where t is time, h host, p item path, a argv, l click to exec latency
+    in ms, rc exit code, rt runtime in s and r reason.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes=1024*1024, keep=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.host = platform.node()
+        self.session = uuid.uuid4().hex[:8]
+        self.counter = 0
+
+    def launched(self, item_path, argv, latency, pid):
+        """Record started process and return id of the record."""
+
+        self.counter += 1
+        record_id = "{}-{}".format(self.session, self.counter)
+        self.write({"e": "launch", "id": record_id, "t": round(time.time(), 3),
+                    "h": self.host, "p": item_path, "a": argv,
+                    "l": round(latency * 1000, 2), "pid": pid})
+        return record_id
+
+    def exited(self, record_id, return_code, runtime):
+        self.write({"e": "exit", "id": record_id, "t": round(time.time(), 3),
+                    "rc": return_code, "rt": round(runtime, 3)})
+
+    def suppressed(self, item_path, reason):
+        self.write({"e": "suppressed", "t": round(time.time(), 3),
+                    "h": self.host, "p": item_path, "r": reason})
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as log_file:
+                log_file.write(line)
+                size = log_file.tell()
+            if size > self.max_bytes:
+                self.rotate()
+        except OSError as e:
+            logging.warning("Launch log \"" + self.path +
+                            "\" cannot be written: " + str(e))
+
+    def rotate(self):
+        """Move current log to a compacted gzip archive."""
+
+        # Rename first, so other instances continue with a new log and only
+        # one instance compacts the old one.
+        rotated = "{}.{}-{}".format(self.path, int(time.time()), self.session)
+        try:
+            os.rename(self.path, rotated)
+        except OSError:
+            return  # Already rotated by another instance
+
+        with open(rotated) as log_file:
+            records = compact_records(read_lines(log_file))
+        with gzip.open(rotated + ".gz", "wt") as archive:
+            for record in records:
+                archive.write(json.dumps(record, separators=(",", ":")) + "\n")
+        os.remove(rotated)
+
+        archives = sorted(glob.glob(self.path + ".*.gz"))
+        for archive in archives[:-self.keep]:
+            os.remove(archive)
+
+
+def read_lines(log_file):
+    for line in log_file:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            pass  # Skip partially written lines
+
+
+def compact_records(records):
+    """Merge exit records into their launch records.
+
+    Exit records without launch record (launched before the log was
+    rotated) are kept as they are.
+    """
+
+    compacted = list()
+    launches = dict()
+    for record in records:
+        if record.get("e") == "launch":
+            launches[record["id"]] = record
+            compacted.append(record)
+        elif record.get("e") == "exit" and record.get("id") in launches:
+            launch = launches.pop(record["id"])
+            launch["rc"] = record["rc"]
+            launch["rt"] = record["rt"]
+        else:
+            compacted.append(record)
+    return compacted
+
+
+def read_log(path=DEFAULT_LOG_PATH):
+    """Return compacted records from log and all its archives."""
+
+    records = list()
+    for archive in sorted(glob.glob(path + ".*.gz")):
+        with gzip.open(archive, "rt") as log_file:
+            records.extend(read_lines(log_file))
+    if os.path.exists(path):
+        with open(path) as log_file:
+            records.extend(read_lines(log_file))
+    return compact_records(records)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+
+DEFAULT_USAGE_PATH = os.path.join(os.path.expanduser("~"), ".pylauncher",
+                                  "usage.db")
+# Score of an item is halved for each HALF_LIFE seconds since its last launch
+HALF_LIFE = 14 * 24 * 3600
+
+
+class usage_store(object):
+
+    """Launch count and time of last launch of each item.
+
+    Items are identified by their id (see launcher_menu_model_item.get_id).
+    Counts are stored in a SQLite database with the default rollback
+    journal, which (unlike WAL) also works on network file systems, so
+    several launcher instances can share the database of a home directory.
+    Launches are written by a background thread, so recording never waits
+    for the database. Records which are not written yet are counted in
+    scores and are written before the program exits. Database is opened
+    when first used. If it cannot be used, launches are not recorded and
+    all scores are 0.
+    """
+
+    def __init__(self, path=DEFAULT_USAGE_PATH, half_life=HALF_LIFE):
+        self.path = path
+        self.half_life = half_life
+        self.connection = None
+        self.failed = False
+        self.lock = threading.Lock()
+        # Held while a record is written and removed from pending, and while
+        # scores are read, so a launch is never counted twice
+        self.write_lock = threading.Lock()
+        # (item id, time) of launches which are not written yet
+        self.pending = list()
+        self.records = queue.Queue()
+        self.writer = None
+
+    def open_connection(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5,
+                                     isolation_level=None)
+        # Databases created by earlier versions stay in WAL mode until they
+        # are switched back.
+        try:
+            connection.execute("PRAGMA journal_mode=DELETE")
+        except sqlite3.OperationalError:
+            pass  # Used by other launcher, switched back later
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            "id TEXT PRIMARY KEY, count INTEGER NOT NULL, "
+            "last REAL NOT NULL) WITHOUT ROWID")
+        return connection
+
+    def connect(self):
+        if self.connection is None and not self.failed:
+            try:
+                self.connection = self.open_connection()
+            except (OSError, sqlite3.Error) as e:
+                logging.warning("Usage statistics \"" + self.path +
+                                "\" cannot be used: " + str(e))
+                self.failed = True
+        return self.connection
+
+    def record(self, item_id):
+        if self.failed:
+            return
+        record = (item_id, time.time())
+        with self.lock:
+            self.pending.append(record)
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_records,
+                                               daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+        self.records.put(record)
+
+    def write_records(self):
+        """Write queued records until None is queued. Runs in a thread."""
+
+        connection = None
+        while True:
+            record = self.records.get()
+            if record is None:
+                break
+            with self.write_lock:
+                try:
+                    if connection is None:
+                        connection = self.open_connection()
+                    connection.execute(
+                        "INSERT INTO usage (id, count, last) "
+                        "VALUES (?, 1, ?) ON CONFLICT(id) DO UPDATE SET "
+                        "count = count + 1, last = excluded.last", record)
+                except (OSError, sqlite3.Error) as e:
+                    logging.warning("Usage statistics \"" + self.path +
+                                    "\" cannot be written: " + str(e))
+                with self.lock:
+                    self.pending.remove(record)
+        if connection is not None:
+            connection.close()
+
+    def get_scores(self):
+        """Return {item id: score}.
+
+        Score is launch count, which decays with time since last launch, so
+        items used often recently score highest.
+        """
+
+        connection = self.connect()
+        if connection is None:
+            return dict()
+        with self.write_lock:
+            try:
+                usage = {item_id: (count, last) for item_id, count, last in
+                         connection.execute(
+                             "SELECT id, count, last FROM usage")}
+            except sqlite3.Error as e:
+                logging.warning("Usage statistics \"" + self.path +
+                                "\" cannot be read: " + str(e))
+                return dict()
+            with self.lock:
+                pending = list(self.pending)
+        for item_id, launched in pending:
+            count, last = usage.get(item_id, (0, launched))
+            usage[item_id] = (count + 1, max(last, launched))
+
+        now = time.time()
+        return {item_id: count * 0.5 ** (max(0, now - last) / self.half_life)
+                for item_id, (count, last) in usage.items()}
+
+    def close(self):
+        """Write pending records and close the database."""
+
+        with self.lock:
+            writer = self.writer
+            self.writer = None
+        if writer is not None:
+            self.records.put(None)
+            writer.join()
+            atexit.unregister(self.close)
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
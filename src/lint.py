@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import collections
+import concurrent.futures
+
+from .launcher_model import format_launcher_template, expand_repeat_item
+from .launcher_spawn import check_executable
+from .launcher_tcl import is_tcl_menu, get_level_path, convert_tcl_menu
+
+# Mandatory parameters of build-in types
+BUILD_IN_TYPES = {"menu": ["text", "file"], "title": ["text"],
+                  "separator": []}
+STRING_PARAMS = ("text", "file", "tip", "help-link", "style", "theme")
+
+
+def loadLauncherCfg(mappingPath):
+    with open(mappingPath) as mappingFile:
+        mapping = json.load(mappingFile)
+    systemType = platform.system()
+    if systemType == "Darwin":
+        systemType = "OS_X"
+    return mapping.get(systemType, dict())
+
+
+class MenuFileReport(object):
+
+    """Result of checking one menu file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.items = 0
+        self.parseTime = 0
+        self.issues = list()
+        # Referenced files as (path, "menu" | "file-choice")
+        self.references = list()
+
+    def error(self, location, message):
+        self.issues.append(("error", location, message))
+
+    def warning(self, location, message):
+        self.issues.append(("warning", location, message))
+
+
+def lintFile(path, launcherCfg, levelPath, checkPath):
+    """Check one menu file and return its MenuFileReport."""
+
+    report = MenuFileReport(path)
+    start = time.perf_counter()
+    try:
+        missing = list()
+        if is_tcl_menu(path):
+            menu, missing = convert_tcl_menu(path, levelPath)
+        else:
+            with open(path, "rb") as menuFile:
+                menu = json.loads(menuFile.read().decode("utf-8"))
+    except SystemExit:
+        report.error(None, "File cannot be converted.")
+        return report
+    except (IOError, ValueError) as e:
+        report.error(None, str(e))
+        return report
+    finally:
+        report.parseTime = time.perf_counter() - start
+
+    for file in missing:
+        report.error(None, "File \"" + file + "\" not found.")
+
+    if not isinstance(menu, dict):
+        report.error(None, "Menu file must contain an object.")
+        return report
+
+    for key, expected in (("menu-title", dict), ("file-choice", list),
+                          ("menu", list), ("password", str),
+                          ("flags", dict)):
+        if key in menu and not isinstance(menu[key], expected):
+            report.error(key, "\"" + key + "\" must be " +
+                         expected.__name__ + ".")
+            menu.pop(key)
+
+    for i, view in enumerate(menu.get("file-choice", list())):
+        location = "file-choice[" + str(i) + "]"
+        if checkParams(report, location, view, ["text", "file"]):
+            addReference(report, location, view["file"], "file-choice")
+
+    items = menu.get("menu", list())
+    if not items:
+        report.warning("menu", "Launcher menu is empty.")
+    report.items = len(items)
+
+    for i, item in enumerate(items):
+        checkItem(report, "menu[" + str(i) + "]", item, launcherCfg,
+                  checkPath)
+
+    return report
+
+
+def checkItem(report, location, item, launcherCfg, checkPath):
+    if not isinstance(item, dict):
+        report.error(location, "Item must be an object.")
+        return
+    itemType = item.get("type")
+    if not itemType:
+        report.error(location, "Item has no type.")
+    elif itemType in launcherCfg and itemType != "theme_base":
+        itemCfg = launcherCfg[itemType]
+        if checkParams(report, location, item, ["text"]) and \
+                checkPath and "command" in itemCfg:
+            checkCommand(report, location, itemCfg, item)
+    elif itemType in BUILD_IN_TYPES:
+        if checkParams(report, location, item,
+                       BUILD_IN_TYPES[itemType]) and itemType == "menu":
+            addReference(report, location, item["file"], "menu")
+    elif itemType == "repeat":
+        # Check each defined item, expanded the same way as by the launcher
+        try:
+            expandedItems = list(expand_repeat_item(item))
+        except ValueError as e:
+            report.error(location, str(e))
+            return
+        if not expandedItems:
+            report.warning(location, "Repeat item defines no items.")
+        report.items += len(expandedItems) - 1
+        for i, expandedItem in enumerate(expandedItems):
+            checkItem(report, location + "[" + str(i) + "]", expandedItem,
+                      launcherCfg, checkPath)
+    else:
+        report.error(location, "Unknown type \"" + str(itemType) + "\".")
+
+
+def checkParams(report, location, item, mandatoryParams):
+    """Report missing and wrongly typed parameters. Return True if valid."""
+
+    valid = True
+    for param in mandatoryParams:
+        if not item.get(param):
+            report.error(location, "Parameter \"" + param +
+                         "\" is mandatory.")
+            valid = False
+    for param in STRING_PARAMS:
+        if param in item and not isinstance(item[param], str):
+            report.error(location, "Parameter \"" + param +
+                         "\" must be string.")
+            valid = False
+    return valid
+
+
+def addReference(report, location, file, kind):
+    file = file.strip()
+    if "://" in file:
+        report.warning(location, "File \"" + file + "\" is not local and " +
+                       "is not checked.")
+        return
+    reference = os.path.normpath(
+        os.path.join(os.path.dirname(report.path), file))
+    if not os.path.isfile(reference):
+        report.error(location, "File \"" + file + "\" not found.")
+        return
+    report.references.append((reference, kind))
+
+
+def checkCommand(report, location, itemCfg, item):
+    cmd = format_launcher_template(itemCfg["command"],
+                                   itemCfg.get("arg_flags", dict()), item)
+    reason = check_executable(cmd)
+    if reason:
+        report.warning(location, reason)
+
+
+def lintTree(rootPath, launcherCfg, checkPath=True, workers=8):
+    """Check root menu and all files referenced from it.
+
+    Files of the same depth are checked in parallel. Returns OrderedDict
+    {path: MenuFileReport} in order of depth.
+    """
+
+    rootPath = os.path.normpath(rootPath)
+    levelPath = get_level_path(rootPath)
+    reports = collections.OrderedDict()
+    frontier = [rootPath]
+    seen = set(frontier)
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        while frontier:
+            results = executor.map(
+                lambda path: lintFile(path, launcherCfg, levelPath,
+                                      checkPath), frontier)
+            nextFrontier = list()
+            for path, report in zip(frontier, results):
+                reports[path] = report
+                for reference, _ in report.references:
+                    if reference not in seen:
+                        seen.add(reference)
+                        nextFrontier.append(reference)
+            frontier = nextFrontier
+
+    return reports
+
+
+def getDepths(rootPath, reports):
+    """Return submenu depth of each file.
+
+    File choices are new root menus, so they start again with depth 0.
+    """
+
+    depths = {os.path.normpath(rootPath): 0}
+    queue = collections.deque(depths)
+    while queue:
+        path = queue.popleft()
+        for reference, kind in reports[path].references:
+            depth = depths[path] + 1 if kind == "menu" else 0
+            if depth < depths.get(reference, sys.maxsize):
+                depths[reference] = depth
+                # Depth 0 is never worse than queued depths, process first
+                if depth == 0:
+                    queue.appendleft(reference)
+                else:
+                    queue.append(reference)
+    return depths
+
+
+def findCycles(reports):
+    """Return submenu cycles as lists of files.
+
+    A submenu which (indirectly) includes itself would be built forever.
+    """
+
+    cycles = list()
+    state = dict()  # 1 while on stack, 2 when done
+    for start in reports:
+        if start in state:
+            continue
+        stack = [(start, iter(reports[start].references))]
+        state[start] = 1
+        while stack:
+            path, references = stack[-1]
+            for reference, kind in references:
+                if kind != "menu":
+                    continue
+                if state.get(reference) == 1:
+                    onStack = [p for p, _ in stack]
+                    cycles.append(onStack[onStack.index(reference):] +
+                                  [reference])
+                elif reference not in state:
+                    state[reference] = 1
+                    stack.append((reference,
+                                  iter(reports[reference].references)))
+                    break
+            else:
+                state[path] = 2
+                stack.pop()
+    return cycles
+
+
+def buildReport(rootPath, reports, duration):
+    depths = getDepths(rootPath, reports)
+    issues = list()
+    files = collections.OrderedDict()
+    for path, report in reports.items():
+        files[path] = {"items": report.items, "depth": depths.get(path),
+                       "parse-time": round(report.parseTime * 1000, 3),
+                       "issues": len(report.issues)}
+        for severity, location, message in report.issues:
+            issues.append({"file": path, "location": location,
+                           "severity": severity, "message": message})
+
+    for cycle in findCycles(reports):
+        issues.append({"file": cycle[0], "location": None,
+                       "severity": "error",
+                       "message": "Submenu cycle: " + " -> ".join(cycle)})
+
+    return {
+        "root": rootPath,
+        "files": files,
+        "issues": issues,
+        "errors": sum(1 for i in issues if i["severity"] == "error"),
+        "warnings": sum(1 for i in issues if i["severity"] == "warning"),
+        "time": round(duration, 3),
+    }
+
+
+def printReport(result):
+    for issue in result["issues"]:
+        location = issue["file"]
+        if issue["location"]:
+            location += ": " + issue["location"]
+        print(location + ": " + issue["severity"] + ": " + issue["message"])
+
+    files = result["files"]
+    depths = [f["depth"] for f in files.values() if f["depth"] is not None]
+    print("Checked {} files ({} items, depth {}) in {:.2f} s: {} errors, "
+          "{} warnings".format(len(files),
+                               sum(f["items"] for f in files.values()),
+                               max(depths) if depths else 0, result["time"],
+                               result["errors"], result["warnings"]))
+
+
+def main():
+    """ Main logic """
+
+    currDir = os.path.dirname(os.path.realpath(__file__))
+
+    argsParse = argparse.ArgumentParser(description='Example: pylauncher-lint --json menus/menu.json')
+    argsParse.add_argument('configuration',
+                           help="root menu/configuration file")
+    argsParse.add_argument('-m', '--mapping',
+                           default=os.path.join(currDir, "resources/mapping/mapping.json"),
+                           help="mapping file (default: mapping of the launcher)")
+    argsParse.add_argument('--json', action='store_true',
+                           help="print report as JSON")
+    argsParse.add_argument('--no-path', action='store_true',
+                           help="do not check if executables are on PATH")
+    argsParse.add_argument('--strict', action='store_true',
+                           help="fail also on warnings")
+    argsParse.add_argument('--jobs', '-j', type=int, default=8,
+                           help="number of files checked in parallel (default: 8)")
+    args = argsParse.parse_args()
+
+    start = time.perf_counter()
+    launcherCfg = loadLauncherCfg(args.mapping)
+    # Converter of .config files prints its messages, keep them out of report
+    with contextlib.redirect_stdout(sys.stderr):
+        reports = lintTree(args.configuration, launcherCfg, not args.no_path,
+                           args.jobs)
+    result = buildReport(os.path.normpath(args.configuration), reports,
+                         time.perf_counter() - start)
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        printReport(result)
+
+    if result["errors"] or (args.strict and result["warnings"]):
+        sys.exit(1)
+
+
+# Start program here
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,15 @@ import os
 import re
 import json
 import logging
-import hashlib
 import argparse
+import tempfile
 import collections
+import concurrent.futures
 import sys
 
+from .launcher_password import hash_password, check_password, is_salted
+from .launcher_model import expand_repeat_item
+
 def loadJson(filePath):
     try:
         with open(filePath) as json_file:
@@ -29,27 +33,108 @@ def loadJson(filePath):
 
     sys.exit(-1)
 
-def processFile(filePath, password, recursive):
-    data = loadJson(filePath)
-    dirname = os.path.dirname(filePath)
-    protected = addPassword(data, hashPassword(password))
-    saveFile(protected, filePath)
-    if recursive:
-        files = findAllFiles(data)
-        for file in files:
-            processFile(os.path.join(dirname, file), password, recursive)
+def buildFileGraph(filePath, recursive, workers=8):
+    """Load root file and, if recursive, all files referenced from it.
+
+    Returns an OrderedDict {path: (data, [referenced paths])} in which each
+    file is present exactly once, so files referenced from many places and
+    reference cycles are loaded only once. Files of the same depth are
+    loaded in parallel.
+    """
+
+    graph = collections.OrderedDict()
+    frontier = [os.path.normpath(filePath)]
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        while frontier:
+            for path, data in zip(frontier, executor.map(loadJson, frontier)):
+                references = list()
+                if recursive:
+                    dirname = os.path.dirname(path)
+                    for file in findAllFiles(data):
+                        if "://" in file:
+                            logging.warning("Referenced file \"" + file +
+                                            "\" is not local. Skipped.")
+                            continue
+                        references.append(
+                            os.path.normpath(os.path.join(dirname, file)))
+                graph[path] = (data, references)
+
+            nextFrontier = list()
+            for path in frontier:
+                for reference in graph[path][1]:
+                    if reference in graph or reference in nextFrontier:
+                        continue
+                    if not os.path.isfile(reference):
+                        logging.warning("Referenced file \"" + reference +
+                                        "\" does not exist. Skipped.")
+                        continue
+                    nextFrontier.append(reference)
+            frontier = nextFrontier
+
+    return graph
+
+def processFile(filePath, password, recursive, dryRun=False, workers=8):
+    """Add password to file and, if recursive, to all referenced files.
+
+    Each file is processed once and independent files are processed in
+    parallel. Files which are already protected with this password are not
+    rewritten. Returns lists of updated and unchanged files.
+    """
+
+    graph = buildFileGraph(filePath, recursive, workers)
+    # One salt for all files, so they are unlocked together in the launcher
+    passwordHash = hashPassword(password)
+
+    # Check each distinct stored hash once. Old (unsalted) hashes are
+    # always replaced.
+    storedHashes = set(data.get("password") for data, _ in graph.values())
+    protectedWith = set(stored for stored in storedHashes
+                        if isinstance(stored, str) and is_salted(stored) and
+                        check_password(password, stored))
+
+    def protectFile(path):
+        data = graph[path][0]
+        if data.get("password") in protectedWith:
+            return False
+        if not dryRun:
+            saveFile(addPassword(data, passwordHash), path)
+        return True
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        changed = list(executor.map(protectFile, graph.keys()))
+
+    updated = [path for path, c in zip(graph.keys(), changed) if c]
+    unchanged = [path for path, c in zip(graph.keys(), changed) if not c]
+    return updated, unchanged
+
+def findMenuItemFiles(items):
+    fileList = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        itemType = item.get("type")
+        if itemType == "menu" and isinstance(item.get("file"), str):
+            fileList.append(item["file"].strip())
+        elif itemType == "repeat":
+            # Files of items defined by the repeat item, not of its template
+            try:
+                fileList += findMenuItemFiles(expand_repeat_item(item))
+            except ValueError:
+                pass  # Reported when menu is parsed
+    return fileList
 
 def findAllFiles(root):
+    """Return menu files referenced from menu root.
+
+    Only submenus and file choices reference menu files. Files of other
+    items (e.g. documents of open-file items) are not menus.
+    """
+
     fileList = []
-    for key in root:
-        if key == 'file':
-            fileList.append(root[key])
-        elif isinstance(root[key], list):
-            for element in root[key]:
-                if isinstance(element, dict):
-                    fileList += findAllFiles(element)
-        elif isinstance(root[key], dict):
-            fileList += findAllFiles(root[key])
+    for view in root.get("file-choice", list()):
+        if isinstance(view, dict) and isinstance(view.get("file"), str):
+            fileList.append(view["file"].strip())
+    fileList += findMenuItemFiles(root.get("menu", list()))
     return fileList
 
 def addPassword(root, password):
@@ -60,13 +145,25 @@ def addPassword(root, password):
     return root
 
 def hashPassword(password):
-    m = hashlib.md5()
-    m.update(password.encode())
-    return m.hexdigest()
+    return hash_password(password)
 
 def saveFile(jsonWithPwd, filename):
-    with open(filename, 'w') as outfile:
-        json.dump(jsonWithPwd, outfile, indent=4)
+    """Write json atomically: to temporary file which replaces filename."""
+
+    dirname, basename = os.path.split(filename)
+    outfile = tempfile.NamedTemporaryFile('w', dir=dirname,
+                                          prefix='.' + basename + '.',
+                                          delete=False)
+    try:
+        with outfile:
+            json.dump(jsonWithPwd, outfile, indent=4)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.chmod(outfile.name, os.stat(filename).st_mode & 0o7777)
+        os.replace(outfile.name, filename)
+    except:
+        os.remove(outfile.name)
+        raise
 
 def main():
     """ Main logic """
@@ -81,6 +178,10 @@ def main():
                           help="password to be added to json file, if not provided user is prompted to enter it")
     argsParse.add_argument('--recursive', '-r',
                           help="add recursively to all files referenced in json", action='store_true')
+    argsParse.add_argument('--dry-run', '-n',
+                          help="only show which files would be changed", action='store_true')
+    argsParse.add_argument('--jobs', '-j', type=int, default=8,
+                          help="number of files processed in parallel (default: 8)")
     args = argsParse.parse_args()
 
     # Add password to json structure
@@ -95,7 +196,17 @@ def main():
     jsonFilePath = os.path.join(cwd, args.configuration)
 
     # Add password to file and, if recursive, to all the files within
-    processFile(jsonFilePath, password, args.recursive)
+    updated, unchanged = processFile(jsonFilePath, password, args.recursive,
+                                     args.dry_run, max(1, args.jobs))
+
+    if args.dry_run:
+        for path in updated:
+            print("Would protect: " + path)
+        print("{} file(s) would be protected, {} already protected.".format(
+            len(updated), len(unchanged)))
+    else:
+        print("{} file(s) protected, {} already protected.".format(
+            len(updated), len(unchanged)))
 
 
 # Start program here
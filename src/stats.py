@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import json
+import math
+import argparse
+import collections
+
+from .launcher_telemetry import DEFAULT_LOG_PATH, read_log
+
+
+def percentile(values, percent):
+    """Return percentile of values using nearest rank."""
+
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, int(math.ceil(percent / 100.0 * len(values))))
+    return values[rank - 1]
+
+
+def aggregate(records, top, failFast):
+    launches = [r for r in records if r.get("e") == "launch"]
+    suppressed = [r for r in records if r.get("e") == "suppressed"]
+
+    counts = collections.Counter(r["p"] for r in launches)
+
+    latencies = collections.defaultdict(list)
+    for record in launches:
+        latencies[record["h"]].append(record["l"])
+    latencyStats = dict()
+    for host, values in sorted(latencies.items()):
+        latencyStats[host] = {"launches": len(values),
+                              "p50": percentile(values, 50),
+                              "p95": percentile(values, 95)}
+
+    allLatencies = [r["l"] for r in launches]
+    failures = collections.Counter()
+    for record in launches:
+        if record.get("rc") and record.get("rt", failFast) < failFast:
+            failures[" ".join(record["a"])] += 1
+
+    return {
+        "launches": len(launches),
+        "suppressed": len(suppressed),
+        "latency": {"p50": percentile(allLatencies, 50),
+                    "p95": percentile(allLatencies, 95),
+                    "hosts": latencyStats},
+        "top": counts.most_common(top),
+        "fail-fast": failures.most_common(top),
+    }
+
+
+def printStats(stats, failFast):
+    print("Launches: {} (suppressed: {})".format(stats["launches"],
+                                                 stats["suppressed"]))
+    print("")
+    print("Top items:")
+    for path, count in stats["top"]:
+        print("  {:6d}  {}".format(count, path))
+    print("")
+    print("Click to spawn latency [ms]:")
+    print("  {:30s} {:>8s} {:>8s} {:>8s}".format("host", "launches", "p50",
+                                               "p95"))
+    latency = stats["latency"]
+    for host, hostStats in latency["hosts"].items():
+        print("  {:30s} {:8d} {:8.1f} {:8.1f}".format(
+            host, hostStats["launches"], hostStats["p50"], hostStats["p95"]))
+    if stats["launches"]:
+        print("  {:30s} {:8d} {:8.1f} {:8.1f}".format(
+            "all", stats["launches"], latency["p50"], latency["p95"]))
+    print("")
+    print("Commands failing within {} s:".format(failFast))
+    for cmd, count in stats["fail-fast"]:
+        print("  {:6d}  {}".format(count, cmd))
+
+
+def main():
+    """ Main logic """
+
+    argsParse = argparse.ArgumentParser(description='Show statistics of launches recorded by pylauncher')
+    argsParse.add_argument('log', nargs='?', default=DEFAULT_LOG_PATH,
+                           help="launch log (default: " + DEFAULT_LOG_PATH + ")")
+    argsParse.add_argument('--top', '-n', type=int, default=10,
+                           help="number of shown items (default: 10)")
+    argsParse.add_argument('--fail-fast', type=float, default=5.0,
+                           help="commands which fail within this many seconds are reported (default: 5)")
+    argsParse.add_argument('--json', action='store_true',
+                           help="print statistics as JSON")
+    args = argsParse.parse_args()
+
+    stats = aggregate(read_log(args.log), args.top, args.fail_fast)
+    if args.json:
+        print(json.dumps(stats, indent=4))
+    else:
+        printStats(stats, args.fail_fast)
+
+
+# Start program here
+if __name__ == '__main__':
+    main()
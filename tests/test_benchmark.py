@@ -0,0 +1,16 @@
+import pytest
+
+from pylauncher.benchmark import summary
+from pylauncher.stats import percentile
+
+
+@pytest.mark.parametrize("n, p95", [(1, 1), (2, 2), (5, 5), (10, 10),
+                                    (19, 19), (20, 19), (21, 20),
+                                    (100, 95)])
+def test_summary_p95(n, p95):
+    # Durations 1 ms ... n ms in seconds, in reverse order
+    values = [i / 1000.0 for i in reversed(range(1, n + 1))]
+    result = summary(values)
+    assert result["p95"] == p95
+    assert result["p95"] == percentile([i for i in range(1, n + 1)], 95)
+    assert result["min"] == 1 and result["max"] == n and result["n"] == n
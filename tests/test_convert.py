@@ -0,0 +1,94 @@
+import io
+import os
+import random
+
+import pytest
+
+from pylauncher.convert.convert import LauncherBaseModel
+
+pyparsing = pytest.importorskip("pyparsing")
+# Converter uses the pyparsing 2 names, deprecated in pyparsing 3
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+# Pieces which are special for pyparsing.nestedExpr or quotedString
+PIECES = ["a", "bc", "-x", "1.5", "$(A)", ";", "#", ":", ",", "=", " ", "  ",
+          "\t", "\\", "\\x", "\\x1f", "\\n", '"', "'", '""', "''", "{", "}",
+          '"a b"', "'a b'", '"a\\"b"', "'a\\'b'", '"{"', "'}'", '"\\x4"',
+          "a\"b", "x'y"]
+
+
+def random_group(rng, depth):
+    parts = list()
+    for _ in range(rng.randint(0, 6)):
+        if depth < 3 and rng.random() < 0.25:
+            parts.append("{" + random_group(rng, depth + 1) + "}")
+        else:
+            parts.append(rng.choice(PIECES))
+    return "".join(parts)
+
+
+def random_lines(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "{" + random_group(rng, 0) + "}"
+
+
+REAL_LINES = [
+    '{@main-title "Menu 0"} {opt: -background rgb:ffff/0000/0000}',
+    '{@title "Section"} {lvl: expert}',
+    '{caqtdm -macro "SYS=ABC,DEV=0" panel.ui} {Panel 0} {help: http://x.y/z}',
+    '{@separator}',
+    '{@menu sub.config} {Sub menu} {lvl: user}',
+    "{xterm -e 'tail -f /var/log/x'} {Log}",
+    '{#This is really just a comment}',
+]
+
+
+@pytest.mark.parametrize("line", REAL_LINES)
+def test_split_line_real(line):
+    line = "{" + line + "}"
+    assert LauncherBaseModel.split_line(line) == \
+        LauncherBaseModel.split_line_pyparsing(line)
+
+
+def test_split_line_matches_pyparsing():
+    handled = 0
+    for line in random_lines(5000, 0):
+        tokens = LauncherBaseModel.split_line(line)
+        if tokens is None:
+            continue  # Split by pyparsing
+        handled += 1
+        assert tokens == LauncherBaseModel.split_line_pyparsing(line), line
+    # Random quotes make some lines unbalanced, most must still be handled
+    assert handled > 2500
+
+
+def test_read_lines():
+    config = io.StringIO("# comment\n\n{a} \\\n  {b}\n{c}\n")
+    assert list(LauncherBaseModel.read_lines(config)) == [
+        (4, "{{a} {b}}"), (5, "{{c}}")]
+
+
+def test_overwrite_keeps_identical_output(tmp_path):
+    from pylauncher.convert.convert import LauncherMenuModelParser
+
+    config = tmp_path / "menu.config"
+    config.write_text('{@main-title} {Menu}\n{xterm} {Terminal}\n')
+    output_path = tmp_path / "out"
+    output_path.mkdir()
+    output_file = output_path / "menu.json"
+
+    def convert():
+        parser = LauncherMenuModelParser(str(config), str(output_path),
+                                         conflict='overwrite', rebuild=True)
+        parser.parse(False, True, 1)
+        return parser.to_json()
+
+    assert convert()['written'] == ['menu.json']
+    os.utime(str(output_file), (0, 0))
+    assert convert()['unchanged'] == ['menu.json']
+    assert output_file.stat().st_mtime == 0
+
+    config.write_text('{@main-title} {Menu}\n{xterm} {Shell}\n')
+    assert convert()['written'] == ['menu.json']
+    assert '"Shell"' in output_file.read_text()
@@ -0,0 +1,115 @@
+import gzip
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from pylauncher.launcher_http import http_pool
+
+
+class CountingServer(ThreadingHTTPServer):
+
+    """Server which counts accepted connections and handled requests."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", 0), Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = list()
+        # Close connection after next response, without telling the client
+        self.drop_connection = False
+        # Statuses of next responses, before the normal response
+        self.statuses = list()
+
+    def url(self, path):
+        return "http://127.0.0.1:{}{}".format(self.server_address[1], path)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(
+                (self.path, self.headers.get("Accept-Encoding", "")))
+            status = self.server.statuses.pop(0) if self.server.statuses \
+                else 200
+            drop = self.server.drop_connection
+            self.server.drop_connection = False
+
+        data = self.path.encode()
+        self.send_response(status)
+        if self.path.endswith(".gz-encoded"):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if drop:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = CountingServer()
+    thread = threading.Thread(target=server.serve_forever,
+                              kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = http_pool(timeout=5, retries=1, backoff=0)
+    yield pool
+    pool.close()
+
+
+def test_connection_reused(server, pool):
+    for i in range(5):
+        response = pool.open(server.url("/menu_{}.json".format(i)))
+        assert response.read() == "/menu_{}.json".format(i).encode()
+    assert server.connections == 1
+    assert pool.connections == 1
+    assert len(server.requests) == 5
+
+
+def test_stale_connection_retried(server):
+    # Without retries of failed requests, only reused connections are
+    # retried
+    pool = http_pool(timeout=5, retries=0, backoff=0)
+    server.drop_connection = True
+    assert pool.open(server.url("/a.json")).read() == b"/a.json"
+    # Idle connection was closed by the server, request is repeated once on
+    # a new connection
+    assert pool.open(server.url("/b.json")).read() == b"/b.json"
+    assert server.connections == 2
+    assert pool.connections == 2
+    assert [path for path, _ in server.requests] == ["/a.json", "/b.json"]
+    pool.close()
+
+
+def test_server_error_retried(server, pool):
+    server.statuses = [503]
+    assert pool.open(server.url("/a.json")).read() == b"/a.json"
+    assert len(server.requests) == 2
+    assert server.connections == 1
+
+
+def test_gzip_decoded(server, pool):
+    response = pool.open(server.url("/menu.gz-encoded"))
+    assert response.read() == b"/menu.gz-encoded"
+    assert "gzip" in server.requests[0][1]
@@ -0,0 +1,146 @@
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from pylauncher.launcher_spawn import get_executable, check_executable, \
+    check_resources, spawn_cmd, get_path_signature, which
+
+
+@pytest.mark.parametrize("cmd, executable", [
+    ("caqtdm -macro X=1 panel.ui", "caqtdm"),
+    ("A=1 B=2 /usr/bin/env", "/usr/bin/env"),
+    ("bash -c 'caqtdm panel.ui'", "caqtdm"),
+    ("sh -ec 'caqtdm panel.ui'", "caqtdm"),
+    # Compound commands are not checked, only the shell
+    ("bash -c '(cd dir && prog)'", "bash"),
+    ("bash -c 'cd dir; prog'", "bash"),
+    ("bash -c 'prog | less'", "bash"),
+    ("bash -c \"$(which prog)\"", "bash"),
+    # Login shells can change PATH
+    ("bash -l -c 'module load x; prog'", "bash"),
+    ("bash -l -c prog", "bash"),
+    ("bash -lc prog", "bash"),
+    ("bash --login -c prog", "bash"),
+    ("bash script.sh", "bash"),
+    # Builtins and expansions are unknown
+    ("ulimit -c 0", None),
+    ("umask 002", None),
+    ("time prog", None),
+    ("module load x", None),
+    ("ml x", None),
+    ("exec prog", None),
+    ("test -f x", None),
+    ("[ -f x ]", None),
+    ("(cd dir && prog)", None),
+    ("\"$(which prog)\" arg", None),
+    ("$HOME/bin/prog", None),
+    ("`which prog`", None),
+    ("", None),
+    ("'unterminated", None),
+])
+def test_get_executable(cmd, executable):
+    assert get_executable(cmd) == executable
+
+
+def test_check_executable():
+    assert check_executable("sh -c 'exit 0'") is None
+    assert check_executable(shutil.which("sh")) is None
+    assert check_executable("./relative/prog") is None
+    assert check_executable("bash -c 'cd /tmp; no-such-prog-x'") is None
+    assert check_executable("no-such-prog-x arg") == \
+        "Program \"no-such-prog-x\" not found on PATH."
+    assert check_executable("sh -c no-such-prog-x") == \
+        "Program \"no-such-prog-x\" not found on PATH."
+    missing = os.path.join(os.sep, "no", "such", "prog")
+    assert check_executable(missing) == \
+        "Program \"" + missing + "\" not found."
+
+
+def read_proc(pid, name):
+    with open(os.path.join("/proc", str(pid), name)) as proc_file:
+        return proc_file.read()
+
+
+@pytest.fixture
+def sleeper():
+    processes = list()
+
+    def spawn(resources):
+        process = spawn_cmd("sleep 30", resources)
+        processes.append(process)
+        return process.pid
+
+    yield spawn
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+linux_only = pytest.mark.skipif(not os.path.isdir("/proc/self"),
+                                reason="requires /proc")
+
+
+@linux_only
+def test_spawn_nice(sleeper):
+    own_nice = os.nice(0)
+    pid = sleeper(check_resources({"nice": 5}, "test"))
+    # Fields after the command name, nice is field 19 of the stat file
+    fields = read_proc(pid, "stat").rsplit(")", 1)[1].split()
+    assert int(fields[16]) == min(own_nice + 5, 19)
+
+
+@linux_only
+def test_spawn_rlimit(sleeper):
+    pid = sleeper(check_resources(
+        {"rlimit": {"nofile": [64, 128], "core": 0}}, "test"))
+    limits = read_proc(pid, "limits")
+    assert re.search(r"^Max open files\s+64\s+128\s", limits, re.M)
+    assert re.search(r"^Max core file size\s+0\s+0\s", limits, re.M)
+
+
+@linux_only
+def test_spawn_cpu_affinity(sleeper):
+    cpu = min(os.sched_getaffinity(0))
+    pid = sleeper(check_resources({"cpu-affinity": [cpu]}, "test"))
+    status = read_proc(pid, "status")
+    assert re.search(r"^Cpus_allowed_list:\s+" + str(cpu) + "$", status,
+                     re.M)
+
+
+@linux_only
+@pytest.mark.skipif(shutil.which("ionice") is None,
+                    reason="requires ionice")
+def test_spawn_ionice(sleeper):
+    resources = check_resources({"ionice": {"class": "idle"}}, "test")
+    if "ionice" not in resources:
+        pytest.skip("ionice not supported on this machine")
+    pid = sleeper(resources)
+    output = subprocess.check_output(["ionice", "-p", str(pid)])
+    assert output.decode().strip() == "idle"
+
+
+def test_spawn_without_resources():
+    process = spawn_cmd("true")
+    assert process.wait() == 0
+
+
+def test_spawn_environment_and_cwd(tmp_path):
+    env = dict(os.environ, PYLAUNCHER_TEST="client")
+    process = spawn_cmd("sh -c 'echo $PYLAUNCHER_TEST > out.txt'",
+                        env=env, cwd=str(tmp_path))
+    assert process.wait() == 0
+    assert (tmp_path / "out.txt").read_text().strip() == "client"
+
+
+def test_which_on_path(tmp_path):
+    program = tmp_path / "pylauncher-test-prog"
+    program.write_text("#!/bin/sh\n")
+    program.chmod(0o755)
+    signature = get_path_signature(str(tmp_path))
+    assert which("pylauncher-test-prog", signature) == str(program)
+    assert check_executable("pylauncher-test-prog", signature) is None
+    assert check_executable("pylauncher-test-prog") == \
+        "Program \"pylauncher-test-prog\" not found on PATH."
@@ -0,0 +1,61 @@
+import sys
+import sqlite3
+
+from pylauncher.launcher_usage import usage_store
+
+
+def test_record_and_scores(tmp_path):
+    path = str(tmp_path / "usage.db")
+    usage = usage_store(path)
+    usage.record("a")
+    usage.record("a")
+    usage.record("b")
+    # Records which are not written yet are counted as well
+    scores = usage.get_scores()
+    assert round(scores["a"], 3) == 2
+    assert round(scores["b"], 3) == 1
+    usage.close()
+
+    usage = usage_store(path)
+    scores = usage.get_scores()
+    assert round(scores["a"], 3) == 2
+    assert round(scores["b"], 3) == 1
+    usage.close()
+
+
+def test_rollback_journal(tmp_path):
+    path = str(tmp_path / "usage.db")
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.close()
+
+    usage = usage_store(path)
+    usage.record("a")
+    usage.close()
+    connection = sqlite3.connect(path)
+    mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    connection.close()
+    assert mode == "delete"
+
+
+def test_unusable_database(tmp_path):
+    (tmp_path / "file").write_text("")
+    usage = usage_store(str(tmp_path / "file" / "usage.db"))
+    assert usage.get_scores() == dict()
+    usage.record("a")
+    usage.close()
+
+
+def test_pending_counted_once(tmp_path):
+    # Frequent thread switches to hit reading of scores while records are
+    # written
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        usage = usage_store(str(tmp_path / "usage.db"))
+        for count in range(1, 201):
+            usage.record("a")
+            assert round(usage.get_scores()["a"], 3) == count
+        usage.close()
+    finally:
+        sys.setswitchinterval(interval)